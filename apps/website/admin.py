@@ -1,18 +1,23 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import Group
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from django import forms
+from django.db import models
+from django.http import FileResponse, HttpResponseNotFound
+from django.urls import path, reverse
 from parler.admin import TranslatableAdmin, TranslatableStackedInline, TranslatableTabularInline
-from import_export.admin import ImportExportModelAdmin
+from import_export.admin import ImportMixin
 from import_export.formats import base_formats
 from .models import (
     Category, Project, ProjectImage, ProjectVideo, ProjectSEO,
     ServiceCategory, Service, ServiceItem, ServiceDetail,
-    TeamMember, CEO, Gallery, GalleryImage, ContactForm, User
+    TeamMember, CEO, Gallery, GalleryImage, ContactForm, DataExport, User
 )
-from .forms import ProjectAdminForm
+from .forms import ChunkedFileInput, ProjectAdminForm
+from .tasks import export_to_xlsx
+from .deletion import remaining_children, schedule_deletion
 
 # Group modelini unregister qilish
 admin.site.unregister(Group)
@@ -54,6 +59,32 @@ def get_translation_status(obj):
     return format_html('<span style="color: #999;">-</span>')
 
 
+class BackgroundDeletionAdminMixin:
+    """
+    Deletes rows with large child collections in the background: the admin
+    only marks them (they disappear from the API at once) and the list
+    shows the purge progress until the rows are gone.
+    """
+    
+    def delete_model(self, request, obj):
+        schedule_deletion(self.model, [obj.pk])
+    
+    def delete_queryset(self, request, queryset):
+        schedule_deletion(self.model, queryset.values_list('pk', flat=True))
+    
+    def has_change_permission(self, request, obj=None):
+        if obj is not None and obj.deleted_at:
+            return False
+        return super().has_change_permission(request, obj)
+    
+    def get_deletion_status(self, obj):
+        if not obj.deleted_at:
+            return '-'
+        remaining = sum(remaining_children(obj).values())
+        return format_html('<span style="color: #c00;">Удаляется… (осталось записей: {})</span>', remaining)
+    get_deletion_status.short_description = 'Удаление'
+
+
 @admin.register(Category)
 class CategoryAdmin(TranslatableAdmin):
     list_display = ['get_name', 'get_translation_status', 'created_at']
@@ -106,7 +137,22 @@ class CategoryAdmin(TranslatableAdmin):
     readonly_fields = ['created_at']
 
 
-class ProjectImageInline(admin.TabularInline):
+class ChunkedUploadInlineMixin:
+    """File fields uploaded in resumable chunks; the widgets accept only the current user's uploads."""
+    formfield_overrides = {
+        models.FileField: {'widget': ChunkedFileInput},
+        models.ImageField: {'widget': ChunkedFileInput},
+    }
+    
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        for field in formset.form.base_fields.values():
+            if isinstance(field.widget, ChunkedFileInput):
+                field.widget.user = request.user
+        return formset
+
+
+class ProjectImageInline(ChunkedUploadInlineMixin, admin.TabularInline):
     model = ProjectImage
     extra = 1
     fields = ('image', 'get_image_preview', 'created_at')
@@ -120,7 +166,7 @@ class ProjectImageInline(admin.TabularInline):
     get_image_preview.short_description = 'Превью'
 
 
-class ProjectVideoInline(admin.TabularInline):
+class ProjectVideoInline(ChunkedUploadInlineMixin, admin.TabularInline):
     model = ProjectVideo
     extra = 1
     fields = ('video', 'created_at')
@@ -138,9 +184,9 @@ class ProjectSEOInline(TranslatableStackedInline):
 
 
 @admin.register(Project)
-class ProjectAdmin(TranslatableAdmin):
+class ProjectAdmin(BackgroundDeletionAdminMixin, TranslatableAdmin):
     form = ProjectAdminForm
-    list_display = ['name', 'get_translation_status', 'created_at']
+    list_display = ['name', 'get_translation_status', 'created_at', 'get_deletion_status']
     list_filter = ['category', 'created_at']
     search_fields = ['translations__name', 'translations__brand', 'translations__country']
     date_hierarchy = 'created_at'
@@ -469,7 +515,7 @@ class CEOAdmin(TranslatableAdmin):
     readonly_fields = ['created_at']
 
 
-class GalleryImageInline(admin.TabularInline):
+class GalleryImageInline(ChunkedUploadInlineMixin, admin.TabularInline):
     model = GalleryImage
     extra = 1
     fields = ('image', 'get_image_preview', 'created_at')
@@ -484,8 +530,8 @@ class GalleryImageInline(admin.TabularInline):
 
 
 @admin.register(Gallery)
-class GalleryAdmin(TranslatableAdmin):
-    list_display = ['name', 'get_translation_status', 'created_at']
+class GalleryAdmin(BackgroundDeletionAdminMixin, TranslatableAdmin):
+    list_display = ['name', 'get_translation_status', 'created_at', 'get_deletion_status']
     list_filter = ['created_at']
     search_fields = ['translations__name', 'translations__description']
     date_hierarchy = 'created_at'
@@ -556,16 +602,26 @@ class GalleryAdmin(TranslatableAdmin):
 
 
 @admin.register(ContactForm)
-class ContactFormAdmin(ImportExportModelAdmin):
+class ContactFormAdmin(ImportMixin, admin.ModelAdmin):
     list_display = ['name', 'phone', 'email', 'get_message_preview', 'created_at']
     list_filter = ['created_at']
     search_fields = ['name', 'phone', 'email', 'message']
     date_hierarchy = 'created_at'
     readonly_fields = ['created_at']
+    actions = ['export_xlsx']
     
     # Faqat Excel formatini qoldirish
     formats = [base_formats.XLSX]
     
+    @admin.action(description='Экспорт в Excel (в фоне)')
+    def export_xlsx(self, request, queryset):
+        export = DataExport.objects.create(user=request.user, model=ContactForm._meta.label)
+        export_to_xlsx.apply_async([export.pk, list(queryset.values_list('pk', flat=True))], idempotency_key=export.pk)
+        self.message_user(request, format_html(
+            'Экспорт поставлен в очередь, файл появится в разделе <a href="{}">Экспорт данных</a>',
+            reverse('admin:website_dataexport_changelist')
+        ), messages.SUCCESS)
+    
     def get_message_preview(self, obj):
         if obj.message:
             return format_html('<span title="{}">{}</span>', obj.message, obj.message[:50] + '...' if len(obj.message) > 50 else obj.message)
@@ -602,3 +658,37 @@ class ContactFormAdmin(ImportExportModelAdmin):
     def has_module_permission(self, request):
         # ContactForm ko'rinishi kerak is_superuser yoki is_manager uchun
         return request.user.is_superuser or (hasattr(request.user, 'is_manager') and request.user.is_manager)
+
+
+@admin.register(DataExport)
+class DataExportAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'status', 'rows', 'user', 'created_at', 'finished_at', 'get_download_link']
+    list_filter = ['status', 'model']
+    readonly_fields = ['model', 'status', 'rows', 'error', 'user', 'created_at', 'finished_at']
+    exclude = ['file']
+    
+    def get_download_link(self, obj):
+        if obj.status == DataExport.Status.DONE and obj.file:
+            return format_html('<a href="{}">Скачать</a>', reverse('admin:website_dataexport_download', args=[obj.pk]))
+        return obj.error[:100] or '-'
+    get_download_link.short_description = 'Файл'
+    
+    def get_urls(self):
+        return [
+            path('<int:pk>/download/', self.admin_site.admin_view(self.download_view), name='website_dataexport_download'),
+        ] + super().get_urls()
+    
+    def download_view(self, request, pk):
+        export = DataExport.objects.filter(pk=pk, status=DataExport.Status.DONE).first()
+        if export is None or not export.file or not self.has_view_permission(request, export):
+            return HttpResponseNotFound('Export not found')
+        return FileResponse(export.file.open('rb'), as_attachment=True, filename=export.file.name)
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_module_permission(self, request):
+        return request.user.is_superuser or (hasattr(request.user, 'is_manager') and request.user.is_manager)
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class WebsiteConfig(AppConfig):
     name = 'apps.website'
     verbose_name = 'Дашборд'
+
+    def ready(self):
+        from django.conf import settings
+        from PIL import Image
+        from . import signals  # noqa: F401
+
+        Image.MAX_IMAGE_PIXELS = settings.IMAGE_MAX_PIXELS
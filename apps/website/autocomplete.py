@@ -0,0 +1,205 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from django.conf import settings
+from .models import Project
+from .translations import TRANSLATION_LANGUAGES
+from .transliteration import normalize_key
+from .versioning import get_versions, local_bumps
+
+
+NAME = 'project'
+BRAND = 'brand'
+
+
+def _word_keys(label):
+    """Search keys of ``label``: its normalized form from every word on, so any word prefix matches."""
+    words = normalize_key(label).split()
+    return [' '.join(words[index:]) for index in range(len(words))]
+
+
+class AutocompleteIndex:
+    """
+    In-memory prefix index of project names and brands: per language,
+    sorted arrays of ``(key, kind, label, project_id)`` bucketed by the
+    first character of the key. Lookups are a bisect plus a short scan and
+    never touch the database.
+
+    Writers copy the buckets they change and swap them in, so readers never
+    lock. Saves in this process update the index right away; changes made
+    by other processes are picked up every ``AUTOCOMPLETE_REFRESH_INTERVAL``
+    seconds, when the project content version moved on by more than this
+    process's own committed changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._projects = {}
+        self._brands = Counter()
+        self._version = None
+        self._local_bumps = 0
+        self._checked_at = 0
+        self.is_built = False
+
+    def _load(self, project_ids=None):
+        ProjectTranslation = Project._parler_meta.root_model
+        rows = ProjectTranslation.objects.filter(master__deleted_at__isnull=True).values_list(
+            'master_id', 'language_code', 'name', 'brand'
+        )
+        if project_ids is not None:
+            rows = rows.filter(master_id__in=project_ids)
+        labels = {}
+        for project_id, language_code, name, brand in rows:
+            project_labels = labels.setdefault(project_id, [])
+            for kind, label in [(NAME, name), (BRAND, brand)]:
+                label = (label or '').strip()
+                if label:
+                    project_labels.append((language_code, kind, label))
+        return labels
+
+    def build(self):
+        """Loads every project translation; called at worker start and when another process changed projects."""
+        bumps = local_bumps(Project)
+        version = self._get_version()
+        labels = self._load()
+        entries = {}
+        brands = Counter()
+        for project_id, project_labels in labels.items():
+            for language_code, kind, label in project_labels:
+                entry_id = project_id
+                if kind == BRAND:
+                    brands[(language_code, label)] += 1
+                    if brands[(language_code, label)] > 1:
+                        continue
+                    entry_id = None
+                for key in _word_keys(label):
+                    entries.setdefault(language_code, {}).setdefault(key[:1], []).append((key, kind, label, entry_id))
+        for buckets in entries.values():
+            for bucket in buckets.values():
+                bucket.sort(key=self._sort_key)
+        with self._lock:
+            self._entries = entries
+            self._projects = labels
+            self._brands = brands
+            self._version = version
+            self._local_bumps = bumps
+            self._checked_at = time.monotonic()
+            self.is_built = True
+
+    def update_projects(self, project_ids):
+        """Re-reads the names and brands of ``project_ids`` (deleted projects drop out)."""
+        if not self.is_built:
+            return
+        labels = self._load(project_ids)
+        with self._lock:
+            buckets = {}
+            brands = self._brands.copy()
+
+            def get_bucket(language_code, key):
+                if (language_code, key[:1]) not in buckets:
+                    buckets[(language_code, key[:1])] = list(self._entries.get(language_code, {}).get(key[:1], []))
+                return buckets[(language_code, key[:1])]
+
+            for project_id in project_ids:
+                for language_code, kind, label in self._projects.pop(project_id, []):
+                    if kind == BRAND:
+                        brands[(language_code, label)] -= 1
+                        if brands[(language_code, label)] > 0:
+                            continue
+                        del brands[(language_code, label)]
+                        entry_id = None
+                    else:
+                        entry_id = project_id
+                    for key in _word_keys(label):
+                        bucket = get_bucket(language_code, key)
+                        entry = (key, kind, label, entry_id)
+                        index = bisect_left(bucket, self._sort_key(entry), key=self._sort_key)
+                        if index < len(bucket) and bucket[index] == entry:
+                            del bucket[index]
+                for language_code, kind, label in labels.get(project_id, []):
+                    if kind == BRAND:
+                        brands[(language_code, label)] += 1
+                        if brands[(language_code, label)] > 1:
+                            continue
+                        entry_id = None
+                    else:
+                        entry_id = project_id
+                    for key in _word_keys(label):
+                        insort(get_bucket(language_code, key), (key, kind, label, entry_id), key=self._sort_key)
+                if project_id in labels:
+                    self._projects[project_id] = labels[project_id]
+            entries = dict(self._entries)
+            for (language_code, first), bucket in buckets.items():
+                if entries.get(language_code) is self._entries.get(language_code):
+                    entries[language_code] = dict(entries.get(language_code, {}))
+                entries[language_code][first] = bucket
+            self._entries = entries
+            self._brands = brands
+
+    def refresh(self):
+        """
+        Builds the index if needed, or rebuilds it when another process
+        changed projects: the version moved on by more than the changes this
+        process committed (which ``update_projects`` already applied).
+        """
+        if not self.is_built:
+            self.build()
+            return
+        if time.monotonic() - self._checked_at < settings.AUTOCOMPLETE_REFRESH_INTERVAL:
+            return
+        self._checked_at = time.monotonic()
+        bumps = local_bumps(Project)
+        version = self._get_version()
+        if version - self._version == bumps - self._local_bumps:
+            with self._lock:
+                self._version = version
+                self._local_bumps = bumps
+        else:
+            self.build()
+
+    def suggest(self, query, languages=None, limit=10):
+        """Top ``limit`` names and brands with a word starting with ``query``, in key order."""
+        prefix = normalize_key(query)
+        if not prefix:
+            return []
+        # The prefix range of every language, merged lazily in key order:
+        # scanning stops once ``limit`` distinct suggestions are found, however
+        # often a label repeats across projects and languages
+        ranges = [
+            self._iter_prefix(self._entries.get(language_code, {}).get(prefix[:1], []), prefix, language_code)
+            for language_code in languages or TRANSLATION_LANGUAGES
+        ]
+        candidates = heapq.merge(*ranges, key=lambda candidate: self._sort_key(candidate[0]))
+        results = []
+        seen = set()
+        for (key, kind, label, project_id), language_code in candidates:
+            identity = (kind, project_id) if kind == NAME else (kind, label)
+            if identity not in seen:
+                seen.add(identity)
+                results.append({'type': kind, 'id': project_id, 'label': label, 'language': language_code})
+                if len(results) == limit:
+                    break
+        return results
+
+    @staticmethod
+    def _iter_prefix(entries, prefix, language_code):
+        index = bisect_left(entries, prefix, key=lambda entry: entry[0])
+        while index < len(entries) and entries[index][0].startswith(prefix):
+            yield entries[index], language_code
+            index += 1
+
+    @staticmethod
+    def _sort_key(entry):
+        key, kind, label, project_id = entry
+        return (key, kind, label, project_id or 0)
+
+    @staticmethod
+    def _get_version():
+        versions, last_modified = get_versions([Project])
+        return next(iter(versions.values()))
+
+
+autocomplete_index = AutocompleteIndex()
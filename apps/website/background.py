@@ -0,0 +1,171 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+# Registered tasks by name
+TASKS = {}
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+class Task:
+    """
+    A function run in the background by the ``TASK_BACKEND`` executor:
+    ``thread`` (worker threads in this process, one pool per queue),
+    ``eager`` (right after the commit, in the calling thread, retries
+    without backoff; for tests) or ``celery``
+    (a broker and ``celery -A config worker -Q <queue>``). All of them go
+    through ``execute``, so retries, idempotency and metrics work the same.
+    Calling the task runs the function directly.
+    """
+
+    def __init__(self, func, name, queue, max_retries, retry_backoff, retry_backoff_max):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self.__name__ = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def __repr__(self):
+        return f'<Task {self.name} ({self.queue})>'
+
+    def delay(self, *args, **kwargs):
+        self.apply_async(args, kwargs)
+
+    def apply_async(self, args=(), kwargs=None, idempotency_key=None):
+        """
+        Queues the task once the current transaction commits (not at all if
+        it rolls back). With ``idempotency_key`` a task already queued or
+        done under the same key within ``TASK_IDEMPOTENCY_TIMEOUT`` is not
+        queued again; arguments must be JSON-serializable for Celery.
+        """
+        message = {'name': self.name, 'args': list(args), 'kwargs': kwargs or {}, 'attempt': 1}
+        if idempotency_key is not None:
+            message['idempotency_key'] = f'task:{self.name}:{idempotency_key}'
+
+        def enqueue():
+            key = message.get('idempotency_key')
+            if key and not cache.add(key, 'queued', settings.TASK_IDEMPOTENCY_TIMEOUT):
+                logger.info('Task %s skipped: %s already queued or done', self.name, key)
+                return
+            submit(message)
+
+        transaction.on_commit(enqueue)
+
+    def get_retry_delay(self, attempt):
+        """Exponential backoff with jitter before retry number ``attempt``."""
+        delay = min(self.retry_backoff * 2 ** (attempt - 1), self.retry_backoff_max)
+        return delay * random.uniform(0.5, 1)
+
+
+def task(name=None, queue='default', max_retries=0, retry_backoff=5, retry_backoff_max=600):
+    """
+    Registers the decorated function as a ``Task`` on ``queue``. A failed
+    run is retried up to ``max_retries`` times, ``retry_backoff`` seconds
+    after the first failure and twice as long after each next one.
+    """
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        TASKS[task_name] = Task(func, task_name, queue, max_retries, retry_backoff, retry_backoff_max)
+        return TASKS[task_name]
+    return decorator
+
+
+def get_executor(queue):
+    """Thread pool of ``queue`` with ``TASK_QUEUES[queue]`` workers."""
+    with _executors_lock:
+        if queue not in _executors:
+            _executors[queue] = ThreadPoolExecutor(
+                max_workers=settings.TASK_QUEUES.get(queue, 1),
+                thread_name_prefix=f'website-{queue}'
+            )
+    return _executors[queue]
+
+
+def submit(message, countdown=0):
+    """Hands ``message`` to the ``TASK_BACKEND`` executor, ``countdown`` seconds from now."""
+    queue = TASKS[message['name']].queue
+    if settings.TASK_BACKEND == 'celery':
+        from config.celery import app
+        app.send_task('website.run_task', args=[message], queue=queue, countdown=countdown or None)
+    elif settings.TASK_BACKEND == 'eager':
+        # Runs in the thread that committed (usually a request): retries
+        # follow at once instead of blocking it for the backoff
+        execute(message)
+    elif countdown:
+        timer = threading.Timer(countdown, lambda: get_executor(queue).submit(_run_in_thread, message))
+        timer.daemon = True
+        timer.start()
+    else:
+        get_executor(queue).submit(_run_in_thread, message)
+
+
+def _run_in_thread(message):
+    try:
+        execute(message)
+    finally:
+        connections.close_all()
+
+
+def execute(message):
+    """
+    Runs one attempt of a queued task, reports it to ``TASK_METRICS_HOOK``
+    and schedules the retry after a failure. Used by every executor.
+    """
+    task = TASKS[message['name']]
+    attempt = message['attempt']
+    key = message.get('idempotency_key')
+    if key and cache.get(key) == 'done':
+        return
+    started = time.monotonic()
+    try:
+        task.func(*message['args'], **message['kwargs'])
+    except Exception:
+        if attempt <= task.max_retries:
+            delay = task.get_retry_delay(attempt)
+            logger.warning('Task %s failed (attempt %s), retrying in %.1fs', task.name, attempt, delay, exc_info=True)
+            _report(task, 'retry', started, attempt)
+            submit({**message, 'attempt': attempt + 1}, countdown=delay)
+        else:
+            logger.exception('Task %s failed', task.name)
+            _report(task, 'failure', started, attempt)
+            if key:
+                # Lets the same task be queued again
+                cache.delete(key)
+        return
+    if key:
+        cache.set(key, 'done', settings.TASK_IDEMPOTENCY_TIMEOUT)
+    _report(task, 'success', started, attempt)
+
+
+def _report(task, status, started, attempt):
+    if not settings.TASK_METRICS_HOOK:
+        return
+    try:
+        import_string(settings.TASK_METRICS_HOOK)(
+            name=task.name, queue=task.queue, status=status,
+            duration=time.monotonic() - started, attempt=attempt
+        )
+    except Exception:
+        logger.exception('Task metrics hook failed')
+
+
+def log_task_metrics(name, queue, status, duration, attempt):
+    """Default ``TASK_METRICS_HOOK``: one log line per task attempt."""
+    logger.info('task=%s queue=%s status=%s duration=%.3fs attempt=%s', name, queue, status, duration, attempt)
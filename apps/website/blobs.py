@@ -0,0 +1,62 @@
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, F
+from .models import MediaBlob
+from .storage import BLOB_PREFIX, blob_storage, is_blob
+
+
+# Models and file fields stored in the content-addressed storage
+BLOB_FIELDS = {
+    'website.ProjectImage': 'image',
+    'website.ProjectVideo': 'video',
+    'website.GalleryImage': 'image',
+    'website.Service': 'image',
+    'website.TeamMember': 'image',
+}
+
+
+def acquire_blob(name):
+    """Counts one more row referencing the stored file ``name``."""
+    if not is_blob(name):
+        return
+    blob, created = MediaBlob.objects.get_or_create(name=name, defaults={'size': blob_storage.size(name)})
+    MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+
+
+def release_blob(name):
+    """
+    Counts one row less referencing ``name``; when none is left the file is
+    deleted after the transaction commits (unless uploaded again meanwhile).
+    """
+    if not is_blob(name):
+        return
+    MediaBlob.objects.filter(name=name, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+    deleted, _ = MediaBlob.objects.filter(name=name, ref_count=0).delete()
+    if deleted:
+        transaction.on_commit(lambda: _delete_unreferenced(name))
+
+
+def _delete_unreferenced(name):
+    if not MediaBlob.objects.filter(name=name).exists():
+        blob_storage.delete(name)
+
+
+def recount_blobs():
+    """Recomputes every reference count from the file fields; returns the number of blobs."""
+    counts = {}
+    for label, field in BLOB_FIELDS.items():
+        rows = (
+            apps.get_model(label).objects.filter(**{f'{field}__startswith': BLOB_PREFIX})
+            .values(field).annotate(count=Count('pk')).order_by()
+        )
+        for row in rows:
+            counts[row[field]] = counts.get(row[field], 0) + row['count']
+    existing = dict(MediaBlob.objects.values_list('name', 'ref_count'))
+    MediaBlob.objects.exclude(name__in=counts).update(ref_count=0)
+    for name, count in counts.items():
+        if name not in existing:
+            size = blob_storage.size(name) if blob_storage.exists(name) else 0
+            MediaBlob.objects.create(name=name, size=size, ref_count=count)
+        elif existing[name] != count:
+            MediaBlob.objects.filter(name=name).update(ref_count=count)
+    return len(counts)
@@ -0,0 +1,55 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import urlencode
+
+
+def make_cache_key(prefix, request, languages=None):
+    """
+    Key from scheme, host, path, sorted query parameters and selected
+    languages; the host and scheme are part of the absolute media URLs.
+    """
+    query = urlencode(sorted((key, sorted(values)) for key, values in request.GET.lists()), doseq=True)
+    value = f'{request.scheme}://{request.get_host()}{request.path}?{query}|{",".join(languages or [])}'
+    return f'{prefix}:{hashlib.sha1(value.encode("utf-8")).hexdigest()}'
+
+
+def get_or_compute(key, version, compute):
+    """
+    Returns the cached value of ``key`` for ``version``, computing it with
+    ``compute()`` on a miss. Only one caller recomputes a key at a time
+    (an ``add``-based lock); while it does, the others get the previous
+    value if there is one (stale-while-revalidate) or wait for the result.
+    Returns ``(value, is_stale)``.
+    """
+    fresh_timeout = settings.API_CACHE_TIMEOUT
+    entry = cache.get(key)
+    if entry and entry['version'] == version and time.time() - entry['created'] < fresh_timeout:
+        return entry['value'], False
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, settings.API_CACHE_LOCK_TIMEOUT):
+        try:
+            value = compute()
+            cache.set(
+                key,
+                {'version': version, 'value': value, 'created': time.time()},
+                fresh_timeout + settings.API_CACHE_STALE_TIMEOUT
+            )
+            return value, False
+        finally:
+            cache.delete(lock_key)
+
+    if entry:
+        return entry['value'], entry['version'] != version
+
+    deadline = time.time() + settings.API_CACHE_LOCK_TIMEOUT
+    while time.time() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry and entry['version'] == version:
+            return entry['value'], False
+        if not cache.get(lock_key):
+            break
+    return compute(), False
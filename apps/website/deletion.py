@@ -0,0 +1,101 @@
+import threading
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .autocomplete import autocomplete_index
+from .background import task
+from .imaging import job_lock
+from .versioning import bump_version
+
+
+# Models deleted in the background and the reverse accessors of their
+# large child collections, purged in batches before the row itself
+CASCADES = {
+    'website.Project': ['images', 'videos'],
+    'website.Gallery': ['images'],
+}
+
+# Set while ``purge_deleted`` deletes child rows of a hidden parent
+_purging = threading.local()
+
+
+def is_purging():
+    """
+    Whether this thread is purging child rows: their parent is already
+    hidden, so snapshot rebuilds and content version bumps are skipped
+    (the version is bumped once when the purge ends).
+    """
+    return getattr(_purging, 'active', False)
+
+
+def schedule_deletion(model, pks):
+    """
+    Marks the rows ``pks`` of ``model`` as deleted, which hides them from the
+    API at once, and purges them in the background once the transaction
+    commits. Returns how many rows were marked.
+    """
+    pks = list(pks)
+    count = model._base_manager.filter(pk__in=pks, deleted_at__isnull=True).update(deleted_at=timezone.now())
+    bump_version(model)
+    label = model._meta.label
+    if label == 'website.Project':
+        transaction.on_commit(lambda: autocomplete_index.update_projects(pks))
+    for pk in pks:
+        purge_deleted.delay(label, pk)
+    return count
+
+
+def remaining_children(instance):
+    """``{accessor: count}`` of the child rows of a deleted ``instance`` not purged yet."""
+    return {
+        accessor: getattr(instance, accessor).count()
+        for accessor in CASCADES[instance._meta.label]
+    }
+
+
+@task(max_retries=5)
+def purge_deleted(model_label, pk):
+    """
+    Background job: deletes a row marked by ``schedule_deletion``. Children
+    go first, ``DELETION_BATCH_SIZE`` rows per transaction through the
+    regular ``delete()``, so their signals release stored files, variants
+    and posters (snapshot and version receivers are skipped, see
+    ``is_purging``); an interrupted purge is resumed by running it again.
+    """
+    model = apps.get_model(model_label)
+    batch_size = settings.DELETION_BATCH_SIZE
+    with job_lock(f'purge-deleted:{model_label}:{pk}') as locked:
+        if not locked:
+            return
+        instance = model._base_manager.filter(pk=pk, deleted_at__isnull=False).first()
+        if instance is None:
+            return
+        _purging.active = True
+        try:
+            for accessor in CASCADES[model_label]:
+                related = getattr(instance, accessor)
+                deleted = False
+                while True:
+                    batch = list(related.order_by('pk').values_list('pk', flat=True)[:batch_size])
+                    if not batch:
+                        break
+                    with transaction.atomic():
+                        related.model._base_manager.filter(pk__in=batch).delete()
+                    deleted = True
+                if deleted:
+                    bump_version(related.model)
+        finally:
+            _purging.active = False
+        instance.delete()
+
+
+def purge_pending_deletions():
+    """Runs the purges left unfinished (e.g. by a restart); returns how many rows were purged."""
+    count = 0
+    for model_label in CASCADES:
+        model = apps.get_model(model_label)
+        for pk in model._base_manager.filter(deleted_at__isnull=False).values_list('pk', flat=True):
+            purge_deleted(model_label, pk)
+            count += 1
+    return count
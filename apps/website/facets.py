@@ -0,0 +1,82 @@
+from django.db.models import Count
+from .models import Category, Project
+from .translations import TRANSLATION_LANGUAGES, build_translations, translation_prefetch
+
+
+TRANSLATED_FACETS = ['brand', 'country']
+
+
+def _value_counts(rows, field):
+    return [
+        {'value': row[field], 'count': row['count']}
+        for row in rows
+        if row[field] and str(row[field]).strip()
+    ]
+
+
+def get_project_facets(queryset, languages=None):
+    """
+    Per-value project counts of ``queryset`` for the catalogue filters,
+    each facet computed with one grouped query::
+
+        {
+            "count": 12,
+            "category": [{"id": 1, "translations": {...}, "count": 5}, ...],
+            "material": [{"value": "Дуб", "count": 3}, ...],
+            "brand": {"ru": [{"value": "Berluc", "count": 4}, ...], "uz": [...]},
+            "country": {"ru": [...], "uz": [...]}
+        }
+
+    Brand and country are translated, so they are counted per language.
+    """
+    project_ids = queryset.order_by().values('pk')
+    projects = Project.objects.filter(pk__in=project_ids).order_by()
+
+    category_counts = {
+        row['category_id']: row['count']
+        for row in projects.filter(category__isnull=False)
+        .values('category_id').annotate(count=Count('id'))
+    }
+    categories = Category.objects.filter(pk__in=category_counts).prefetch_related(
+        translation_prefetch(Category, 'translations', languages)
+    )
+    category_facet = sorted(
+        (
+            {
+                'id': category.pk,
+                'translations': build_translations(category, ['name'], languages),
+                'count': category_counts[category.pk],
+            }
+            for category in categories
+        ),
+        key=lambda item: (-item['count'], item['id'])
+    )
+
+    material_facet = _value_counts(
+        projects.values('material').annotate(count=Count('id')).order_by('-count', 'material'),
+        'material'
+    )
+
+    ProjectTranslation = Project._parler_meta.root_model
+    translations = ProjectTranslation.objects.filter(
+        master_id__in=project_ids,
+        language_code__in=languages or TRANSLATION_LANGUAGES
+    )
+    translated_facets = {}
+    for field in TRANSLATED_FACETS:
+        facet = {lang_code: [] for lang_code in languages or TRANSLATION_LANGUAGES}
+        rows = (
+            translations.values('language_code', field)
+            .annotate(count=Count('master_id', distinct=True))
+            .order_by('language_code', '-count', field)
+        )
+        for row in rows:
+            facet[row['language_code']].extend(_value_counts([row], field))
+        translated_facets[field] = facet
+
+    return {
+        'count': projects.count(),
+        'category': category_facet,
+        'material': material_facet,
+        **translated_facets,
+    }
@@ -1,7 +1,11 @@
 from django import forms
+from django.conf import settings
+from django.contrib.admin.widgets import AdminFileWidget
+from django.urls import reverse
 from django.utils.html import format_html, escape
 from django.utils.safestring import mark_safe
 from .models import Project
+from .uploads import FINGERPRINT_SAMPLE_SIZE, get_uploaded_file
 import json
 from parler.forms import TranslatableModelForm
 
@@ -220,3 +224,59 @@ class ProjectAdminForm(TranslatableModelForm):
         
         return cleaned_data
 
+
+class ChunkedFileInput(AdminFileWidget):
+    """
+    Admin file input that uploads the selected file in resumable chunks
+    (``static/admin/js/chunked_upload.js``) and submits only the id of the
+    finished upload session in ``<name>_upload``. Only sessions of ``user``
+    (set by the admin for the current request) are accepted.
+    """
+    
+    user = None
+    
+    class Media:
+        js = ('admin/js/chunked_upload.js',)
+    
+    def __init__(self, attrs=None):
+        super().__init__(attrs)
+        # Resolved upload sessions by (name, session id): value_from_datadict
+        # runs several times per form and each resolve opens the file
+        self._uploaded_files = {}
+    
+    def __deepcopy__(self, memo):
+        # Every form gets its own copy of the widget, and its own files
+        obj = super().__deepcopy__(memo)
+        obj._uploaded_files = {}
+        return obj
+    
+    def get_context(self, name, value, attrs):
+        attrs = {
+            **(attrs or {}),
+            'data-chunked-upload': reverse('admin-upload-create'),
+            'data-chunk-size': settings.UPLOAD_CHUNK_SIZE,
+            'data-fingerprint-sample': FINGERPRINT_SAMPLE_SIZE,
+        }
+        return super().get_context(name, value, attrs)
+    
+    def render(self, name, value, attrs=None, renderer=None):
+        html = super().render(name, value, attrs, renderer)
+        return mark_safe(html + format_html(
+            '<input type="hidden" name="{}_upload" value="" data-chunked-upload-id>'
+            '<span class="chunked-upload-progress" style="margin-left: 10px; color: #666;"></span>',
+            name
+        ))
+    
+    def value_from_datadict(self, data, files, name):
+        session_id = data.get(f'{name}_upload')
+        if session_id:
+            key = (name, session_id)
+            if key not in self._uploaded_files:
+                self._uploaded_files[key] = get_uploaded_file(session_id, self.user)
+            uploaded = self._uploaded_files[key]
+            if uploaded is not None:
+                return uploaded
+        return super().value_from_datadict(data, files, name)
+    
+    def value_omitted_from_data(self, data, files, name):
+        return not data.get(f'{name}_upload') and super().value_omitted_from_data(data, files, name)
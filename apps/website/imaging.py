@@ -0,0 +1,449 @@
+import base64
+import io
+import math
+import os
+import time
+from contextlib import contextmanager
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageCms, ImageOps, features
+from .background import task
+
+
+EXIF_ORIENTATION = 0x0112
+
+# format -> (Pillow format, file extension, MIME type)
+FORMATS = {
+    'avif': ('AVIF', 'avif', 'image/avif'),
+    'webp': ('WEBP', 'webp', 'image/webp'),
+    'jpeg': ('JPEG', 'jpg', 'image/jpeg'),
+    'png': ('PNG', 'png', 'image/png'),
+}
+
+# Models with an ``image`` field and a ``variants`` JSON field
+VARIANT_MODELS = ['website.ProjectImage', 'website.GalleryImage', 'website.Service', 'website.TeamMember']
+
+# Seconds one row's variant job may hold its lock
+VARIANT_LOCK_TIMEOUT = 300
+
+# Source formats kept on normalization when they carry transparency
+ALPHA_FORMATS = {'PNG': 'png', 'WEBP': 'webp'}
+
+# Models with width/height/size/mime_type/color columns filled on save
+METADATA_MODELS = ['website.ProjectImage', 'website.GalleryImage']
+
+# Source formats Pillow can decode at a reduced scale (``draft``)
+DRAFT_FORMATS = {'JPEG'}
+
+# Longest side (px) and quality of the inline placeholder thumbnails
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
+
+
+def get_variant_formats():
+    return [fmt for fmt in settings.IMAGE_VARIANT_FORMATS if fmt == 'jpeg' or features.check(fmt)]
+
+
+def open_image(name, storage=default_storage, width=0, height=0, crop=False):
+    """
+    Opens a stored image upright (EXIF orientation applied) and fully
+    loaded. Given the box of a following ``resize_image``, JPEGs are decoded
+    at the smallest DCT scale (``draft``) that still covers the result.
+    """
+    with storage.open(name, 'rb') as file:
+        image = Image.open(file)
+        if (width or height) and image.format in DRAFT_FORMATS:
+            size = image.size
+            if image.getexif().get(EXIF_ORIENTATION, 1) in (5, 6, 7, 8):
+                size = size[::-1]
+            scale = get_resize_scale(size, width, height, crop)
+            if scale < 1:
+                image.draft(image.mode, (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    return image
+
+
+def encode_image(image, fmt, quality=None):
+    """Encodes ``image`` as ``fmt`` (a key of ``FORMATS``) and returns the bytes."""
+    quality = quality or settings.IMAGE_VARIANT_QUALITY
+    pillow_format = FORMATS[fmt][0]
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if fmt == 'jpeg' or not has_alpha:
+        image = image.convert('RGB')
+    elif image.mode != 'RGBA':
+        image = image.convert('RGBA')
+    options = {'quality': quality}
+    if fmt == 'jpeg':
+        options.update(optimize=True, progressive=True)
+    elif fmt == 'webp':
+        options.update(method=4)
+    elif fmt == 'avif':
+        options.update(speed=6)
+    elif fmt == 'png':
+        options = {'optimize': True}
+    buffer = io.BytesIO()
+    image.save(buffer, pillow_format, **options)
+    return buffer.getvalue()
+
+
+def variant_path(name, width, fmt):
+    base, ext = os.path.splitext(name)
+    return f'variants/{base}/{width}.{FORMATS[fmt][1]}'
+
+
+def generate_variants(field_file, image=None):
+    """
+    Writes the configured widths (never upscaled) of a stored image in every
+    available format and returns the ``variants`` value::
+
+        {"source": "projects/a.jpg", "width": 2400, "height": 1600,
+         "files": {"webp": {"320": "variants/projects/a/320.webp", ...}, ...}}
+    """
+    if image is None:
+        image = open_image(field_file.name, field_file.storage)
+    widths = sorted({min(width, image.width) for width in settings.IMAGE_VARIANT_WIDTHS})
+    files = {}
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize(
+            (width, height), Image.Resampling.LANCZOS, reducing_gap=3.0
+        )
+        for fmt in get_variant_formats():
+            path = variant_path(field_file.name, width, fmt)
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            files.setdefault(fmt, {})[str(width)] = default_storage.save(path, ContentFile(encode_image(resized, fmt)))
+    return {'source': field_file.name, 'width': image.width, 'height': image.height, 'files': files}
+
+
+def get_resize_scale(size, width=0, height=0, crop=False):
+    """Factor (at most 1) by which ``resize_image`` scales an image of ``size``."""
+    image_width, image_height = size
+    if crop and width and height:
+        return min(1, max(width / image_width, height / image_height))
+    scales = [1]
+    if width:
+        scales.append(width / image_width)
+    if height:
+        scales.append(height / image_height)
+    return min(scales)
+
+
+def resize_image(image, width=0, height=0, crop=False):
+    """
+    Scales ``image`` down to fit ``width`` x ``height`` (0 = unconstrained),
+    or with ``crop`` fills the box exactly, cutting the overflow around the
+    centre. Never upscales.
+    """
+    if crop and width and height:
+        scale = min(1, image.width / width, image.height / height)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+    scale = get_resize_scale(image.size, width, height)
+    if scale == 1:
+        return image
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+
+def get_pixel_limit(image):
+    """Largest accepted pixel count of an opened image: ``IMAGE_DECODE_MAX_PIXELS`` for formats decoded in full."""
+    if image.format in DRAFT_FORMATS:
+        return settings.IMAGE_MAX_PIXELS
+    return min(settings.IMAGE_MAX_PIXELS, settings.IMAGE_DECODE_MAX_PIXELS)
+
+
+def validate_image_pixels(value):
+    """Rejects uploads above ``get_pixel_limit`` from the header alone, before anything is decoded."""
+    if not value or getattr(value, '_committed', True):
+        return
+    file = value.file
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            pixels = image.width * image.height
+            limit = get_pixel_limit(image)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        pixels = None
+        limit = settings.IMAGE_MAX_PIXELS
+    finally:
+        file.seek(0)
+    if pixels is None or pixels > limit:
+        raise ValidationError(
+            'Изображение слишком большое (не более %(limit)s млн пикселей).',
+            params={'limit': limit // 1_000_000},
+            code='image_too_large',
+        )
+
+
+def _to_srgb(image):
+    """RGB (RGBA if transparent) in sRGB, converted from the embedded ICC profile when there is one."""
+    icc_profile = image.info.get('icc_profile')
+    mode = 'RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB'
+    if icc_profile and features.check('littlecms2'):
+        try:
+            source = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+            if image.mode not in ('RGB', 'RGBA', 'CMYK', 'L'):
+                image = image.convert(mode)
+            return ImageCms.profileToProfile(image, source, ImageCms.createProfile('sRGB'), outputMode=mode)
+        except (ImageCms.PyCMSError, OSError, ValueError):
+            pass
+    return image.convert(mode) if image.mode != mode else image
+
+
+def needs_normalizing(image):
+    max_side = settings.IMAGE_UPLOAD_MAX_SIDE
+    return (
+        image.format not in ('JPEG', 'PNG', 'WEBP')
+        or max(image.size) > max_side
+        or image.mode not in ('RGB', 'RGBA', 'L', 'LA', 'P')
+        or bool(image.getexif())
+        or 'icc_profile' in image.info
+        or (image.format == 'JPEG' and not image.info.get('progressive'))
+    )
+
+
+def normalize_image(file):
+    """
+    Upload normalization: EXIF orientation applied, metadata stripped,
+    colours converted to sRGB, longest side capped at
+    ``IMAGE_UPLOAD_MAX_SIDE`` and re-encoded (progressive JPEG, or PNG/WebP
+    for transparent sources). Returns ``(bytes, format)``, or ``None`` when
+    the file is already clean or animated.
+
+    Memory stays bounded: JPEGs are decoded at a reduced DCT scale
+    (``draft``). Other formats have no reduced decode, so they are refused
+    above ``IMAGE_DECODE_MAX_PIXELS`` (see ``get_pixel_limit``) and shrunk
+    with ``reduce`` right after decoding, before the Lanczos pass.
+    """
+    max_side = settings.IMAGE_UPLOAD_MAX_SIDE
+    with Image.open(file) as image:
+        if image.width * image.height > get_pixel_limit(image):
+            raise Image.DecompressionBombError(f'{image.format} {image.width}x{image.height} is too large to decode')
+        if getattr(image, 'n_frames', 1) > 1 or not needs_normalizing(image):
+            return None
+        source_format = image.format
+        orientation = image.getexif().get(EXIF_ORIENTATION, 1)
+        if source_format in DRAFT_FORMATS:
+            image.draft(image.mode, (max_side, max_side))
+        image.load()
+        image = _to_srgb(image)
+    factor = max(image.size) // max_side
+    if factor >= 2:
+        # ``_to_srgb`` returns RGB or RGBA, which ``reduce`` supports
+        image = image.reduce(factor)
+    if orientation != 1:
+        image.getexif()[EXIF_ORIENTATION] = orientation
+        image = ImageOps.exif_transpose(image)
+    if max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    # Drops EXIF, ICC profile and text chunks that PNG would copy from ``info``
+    image.info = {}
+    fmt = ALPHA_FORMATS.get(source_format, 'png') if image.mode == 'RGBA' else 'jpeg'
+    return encode_image(image, fmt, settings.IMAGE_UPLOAD_QUALITY), fmt
+
+
+def normalize_upload(instance):
+    """Replaces a newly assigned ``instance.image`` by its normalized version (see ``normalize_image``)."""
+    image = instance.image
+    if not image or image._committed:
+        return
+    image.file.seek(0)
+    result = normalize_image(image.file)
+    if result is None:
+        image.file.seek(0)
+        return
+    data, fmt = result
+    name = f'{os.path.splitext(os.path.basename(image.name))[0]}.{FORMATS[fmt][1]}'
+    instance.image = ContentFile(data, name=name)
+
+
+def read_image_metadata(file):
+    """
+    Displayed width/height (EXIF rotation applied), MIME type and average
+    colour (``#rrggbb``) of an image path or file object. Only a reduced
+    decode is needed for the colour (JPEG draft mode).
+    """
+    with Image.open(file) as image:
+        width, height = image.size
+        if image.getexif().get(EXIF_ORIENTATION, 1) in (5, 6, 7, 8):
+            width, height = height, width
+        mime_type = Image.MIME.get(image.format, '')
+        image.thumbnail((64, 64))
+        red, green, blue = image.convert('RGB').resize((1, 1), Image.Resampling.BOX).getpixel((0, 0))
+    return {
+        'width': width,
+        'height': height,
+        'mime_type': mime_type,
+        'color': f'#{red:02x}{green:02x}{blue:02x}',
+    }
+
+
+def apply_image_metadata(instance):
+    """
+    Fills the metadata columns of ``instance`` from its image before it is
+    saved: for new uploads and rows not read yet. Unreadable files leave
+    the columns empty.
+    """
+    image = instance.image
+    if not image:
+        instance.width = instance.height = instance.size = None
+        instance.mime_type = instance.color = ''
+        return
+    if image._committed and instance.width is not None:
+        return
+    try:
+        if image._committed:
+            with image.storage.open(image.name, 'rb') as file:
+                metadata = read_image_metadata(file)
+        else:
+            image.file.seek(0)
+            metadata = read_image_metadata(image.file)
+            image.file.seek(0)
+        metadata['size'] = image.size
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return
+    for field, value in metadata.items():
+        setattr(instance, field, value)
+
+
+def make_placeholder(image):
+    """
+    Low-quality image placeholder: a ``PLACEHOLDER_SIZE`` px thumbnail as an
+    inline ``data:`` URI (a few hundred bytes) that clients paint blurred
+    while the real image loads.
+    """
+    thumbnail = image.copy()
+    thumbnail.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.Resampling.BOX)
+    fmt = 'webp' if features.check('webp') else 'jpeg'
+    data = base64.b64encode(encode_image(thumbnail, fmt, PLACEHOLDER_QUALITY)).decode('ascii')
+    return f'data:{FORMATS[fmt][2]};base64,{data}'
+
+
+def find_variants(name):
+    """``(variants, placeholder)`` already generated by any row for the stored file ``name``, or ``None``."""
+    for label in VARIANT_MODELS:
+        row = (
+            apps.get_model(label).objects.filter(image=name, variants__source=name)
+            .values_list('variants', 'placeholder').first()
+        )
+        if row:
+            return row
+    return None
+
+
+def source_in_use(name):
+    return any(apps.get_model(label).objects.filter(image=name).exists() for label in VARIANT_MODELS)
+
+
+@task(queue='media', max_retries=3)
+def delete_variants(variants, keep=None):
+    """
+    Deletes the files of ``variants`` that are not part of ``keep``. Variants
+    of a stored file still used by another row (deduplicated uploads share
+    them) are kept.
+    """
+    source = (variants or {}).get('source')
+    if source and source_in_use(source):
+        return
+    kept = {path for sizes in (keep or {}).get('files', {}).values() for path in sizes.values()}
+    for sizes in (variants or {}).get('files', {}).values():
+        for path in sizes.values():
+            if path not in kept:
+                default_storage.delete(path)
+
+
+def needs_variants(instance):
+    if instance.image:
+        return instance.variants.get('source') != instance.image.name
+    return bool(instance.variants)
+
+
+@contextmanager
+def job_lock(key):
+    """``cache.add`` lock shared by all workers; yields ``False`` if it wasn't free within ``VARIANT_LOCK_TIMEOUT``."""
+    deadline = time.monotonic() + VARIANT_LOCK_TIMEOUT
+    while not cache.add(key, 1, VARIANT_LOCK_TIMEOUT):
+        if time.monotonic() > deadline:
+            yield False
+            return
+        time.sleep(0.1)
+    try:
+        yield True
+    finally:
+        cache.delete(key)
+
+
+@task(queue='media', max_retries=2)
+def refresh_variants(model_label, pk):
+    """
+    Background job: (re)generates the variants and placeholder of one row
+    after its image changed. Jobs for the same row run one at a time and
+    re-read the row, so a re-upload during generation is picked up; the
+    save runs the usual signals (snapshots, content versions). Rows sharing
+    a stored file take turns on it and reuse the variants generated first.
+    """
+    model = apps.get_model(model_label)
+    with job_lock(f'image-variants:{model_label}:{pk}') as locked:
+        while locked:
+            instance = model.objects.filter(pk=pk).first()
+            if instance is None or not needs_variants(instance):
+                return
+            previous = instance.variants
+            name = instance.image.name or ''
+            with job_lock(f'image-variants:source:{name}') as source_locked:
+                if not source_locked:
+                    return
+                variants = {}
+                placeholder = ''
+                shared = find_variants(name) if name else None
+                if shared:
+                    variants, placeholder = shared
+                elif name:
+                    image = open_image(name, instance.image.storage)
+                    variants = generate_variants(instance.image, image)
+                    placeholder = make_placeholder(image)
+                current_name = model.objects.filter(pk=pk).values_list('image', flat=True).first()
+                if current_name != name:
+                    delete_variants(variants, keep=previous)
+                    continue
+                instance.variants = variants
+                instance.placeholder = placeholder
+                instance.save(update_fields=['variants', 'placeholder'])
+            delete_variants(previous, keep=variants)
+
+
+def build_srcset(variants, request=None):
+    """``{"webp": "<url> 320w, <url> 640w", ...}`` from a ``variants`` value, in format preference order."""
+    files = (variants or {}).get('files', {})
+    srcset = {}
+    for fmt in FORMATS:
+        if fmt not in files:
+            continue
+        candidates = []
+        for width, path in sorted(files[fmt].items(), key=lambda item: int(item[0])):
+            url = default_storage.url(path)
+            if request:
+                url = request.build_absolute_uri(url)
+            candidates.append(f'{url} {width}w')
+        srcset[fmt] = ', '.join(candidates)
+    return srcset
+
+
+def absolutize_srcset(srcset, request=None):
+    """Makes the URLs of a ``build_srcset`` result built without a request absolute."""
+    if not request or not srcset:
+        return srcset or {}
+    result = {}
+    for fmt, value in srcset.items():
+        candidates = []
+        for candidate in value.split(', '):
+            url, descriptor = candidate.rsplit(' ', 1)
+            candidates.append(f'{request.build_absolute_uri(url)} {descriptor}')
+        result[fmt] = ', '.join(candidates)
+    return result
@@ -0,0 +1,249 @@
+import atexit
+import fcntl
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DataError, IntegrityError, OperationalError, connections
+from .models import ContactForm
+from .tasks import notify_contact_form
+
+
+logger = logging.getLogger(__name__)
+
+# Retries of a batch the database refused for a transient reason (e.g.
+# "database is locked") and the seconds between them
+WRITE_RETRIES = 8
+WRITE_RETRY_DELAY = 0.5
+WRITE_RETRY_DELAY_MAX = 10
+
+# Appended to spool segments that can't be replayed; they are kept for
+# inspection and no longer picked up
+QUARANTINE_SUFFIX = '.bad'
+
+
+class SpoolSegment:
+    """
+    An append-only JSON lines file of acknowledged submissions. The process
+    writing it holds an exclusive ``flock`` on it until it is deleted, so a
+    replay only picks up segments of processes that are gone.
+    """
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, f'{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl')
+        self.file = open(self.path, 'ab')
+        fcntl.flock(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self.size = 0
+        self.pending = 0
+
+    def append(self, line):
+        self.file.write(line)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.size += len(line)
+        self.pending += 1
+
+    def truncate(self):
+        self.file.truncate(0)
+        os.fsync(self.file.fileno())
+        self.size = 0
+
+    def delete(self):
+        os.remove(self.path)
+        self.file.close()
+
+
+class ContactFormBuffer:
+    """
+    High-throughput ``ContactForm`` ingestion: ``submit`` appends the record
+    to a spool segment (fsynced) and queues it; a writer thread saves queued
+    records with ``bulk_create`` in batches of ``CONTACT_FORM_BATCH_SIZE``,
+    at least every ``CONTACT_FORM_FLUSH_INTERVAL`` seconds. Transient
+    database errors are retried ``WRITE_RETRIES`` times; records that still
+    can't be saved are logged and left in the spool. Segments whose records
+    are all saved are deleted (the current one is truncated);
+    ``replay_spool`` saves what a stopped process left behind. ``submission_id`` is unique, so records
+    are saved once even if replayed twice.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=settings.CONTACT_FORM_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._segment = None
+        self._segments = []
+        self._writer = None
+        self._stopping = False
+
+    def submit(self, data):
+        """Durably accepts the validated fields ``data``; returns the ``submission_id``."""
+        record = {**data, 'submission_id': str(uuid.uuid4())}
+        line = (json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            if self._segment is None or self._segment.size >= settings.CONTACT_FORM_SPOOL_SEGMENT_SIZE:
+                os.makedirs(str(settings.CONTACT_FORM_SPOOL_DIR), exist_ok=True)
+                self._segment = SpoolSegment(str(settings.CONTACT_FORM_SPOOL_DIR))
+                self._segments.append(self._segment)
+            self._segment.append(line)
+            segment = self._segment
+            self._start_writer()
+        # Outside the lock: a full queue blocks until the writer catches up
+        self._queue.put((segment, record))
+        return record['submission_id']
+
+    def _start_writer(self):
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._write_loop, name='website-contact-forms', daemon=True)
+            self._writer.start()
+
+    def _write_loop(self):
+        while not self._stopping or not self._queue.empty():
+            batch = self._next_batch()
+            if batch:
+                self._write_batch(batch)
+        connections.close_all()
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=settings.CONTACT_FORM_FLUSH_INTERVAL)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + settings.CONTACT_FORM_FLUSH_INTERVAL
+        while len(batch) < settings.CONTACT_FORM_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_batch(self, batch):
+        saved = self._save(batch)
+        with self._lock:
+            for segment, record in saved:
+                segment.pending -= 1
+            for segment in list(self._segments):
+                if segment.pending:
+                    continue
+                if segment is self._segment:
+                    segment.truncate()
+                else:
+                    segment.delete()
+                    self._segments.remove(segment)
+
+    def _save(self, batch):
+        """Saves what it can of ``batch``; returns the saved items."""
+        delay = WRITE_RETRY_DELAY
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                save_contact_forms([record for segment, record in batch])
+                return batch
+            except OperationalError:
+                if attempt == WRITE_RETRIES:
+                    logger.exception('Saving %s contact forms failed %s times', len(batch), attempt + 1)
+                    break
+                logger.warning('Saving %s contact forms failed, retrying in %ss', len(batch), delay, exc_info=True)
+                connections.close_all()
+                time.sleep(delay)
+                delay = min(delay * 2, WRITE_RETRY_DELAY_MAX)
+            except Exception:
+                if len(batch) > 1:
+                    # Not transient: find the records that can't be saved
+                    saved = []
+                    for item in batch:
+                        saved.extend(self._save([item]))
+                    return saved
+                logger.exception('Saving a contact form failed')
+                break
+        logger.error('Contact forms left in the spool for the next replay: %s', [record for segment, record in batch])
+        return []
+
+    def stop(self):
+        """Saves the queued records and stops the writer (at interpreter exit)."""
+        self._stopping = True
+        if self._writer is not None and self._writer.is_alive():
+            self._writer.join(settings.CONTACT_FORM_FLUSH_INTERVAL * 10)
+
+
+def save_contact_forms(records):
+    """Saves ``records`` (skipping already saved submissions) and queues the notifications of the new ones."""
+    submission_ids = [record['submission_id'] for record in records]
+    existing = {
+        str(submission_id)
+        for submission_id in ContactForm.objects.filter(submission_id__in=submission_ids).values_list('submission_id', flat=True)
+    }
+    ContactForm.objects.bulk_create(
+        [ContactForm(**record) for record in records if record['submission_id'] not in existing],
+        ignore_conflicts=True
+    )
+    if settings.CONTACT_FORM_NOTIFY_EMAILS:
+        new_ids = [submission_id for submission_id in submission_ids if submission_id not in existing]
+        for pk in ContactForm.objects.filter(submission_id__in=new_ids).values_list('pk', flat=True):
+            notify_contact_form.apply_async([pk], idempotency_key=pk)
+
+
+def replay_spool():
+    """
+    Saves the records of spool segments left by processes that stopped
+    before writing them, then deletes the segments. Segments still locked
+    by a running process are skipped; unreadable ones or ones with records
+    the database rejects are logged and renamed with ``QUARANTINE_SUFFIX``.
+    Returns how many records were read.
+    """
+    count = 0
+    for path in sorted(glob.glob(os.path.join(str(settings.CONTACT_FORM_SPOOL_DIR), '*.jsonl'))):
+        try:
+            count += _replay_segment(path)
+        except (OSError, ValueError, TypeError, DataError, IntegrityError):
+            logger.exception('Contact form spool segment %s could not be replayed', path)
+            _quarantine(path)
+    return count
+
+
+def _replay_segment(path):
+    try:
+        file = open(path, 'rb')
+    except FileNotFoundError:
+        return 0
+    with file:
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return 0
+        records = []
+        for line in file:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # The last line of a crashed write was never acknowledged
+                continue
+        for start in range(0, len(records), settings.CONTACT_FORM_BATCH_SIZE):
+            save_contact_forms(records[start:start + settings.CONTACT_FORM_BATCH_SIZE])
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Replayed by another process starting at the same time
+            pass
+    return len(records)
+
+
+def _quarantine(path):
+    try:
+        os.replace(path, path + QUARANTINE_SUFFIX)
+    except FileNotFoundError:
+        pass
+    except OSError:
+        logger.exception('Contact form spool segment %s could not be quarantined', path)
+    else:
+        logger.error('Contact form spool segment quarantined as %s%s', path, QUARANTINE_SUFFIX)
+
+
+contact_form_buffer = ContactFormBuffer()
+atexit.register(contact_form_buffer.stop)
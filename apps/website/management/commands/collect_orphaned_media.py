@@ -0,0 +1,41 @@
+import json
+from django.core.management.base import BaseCommand
+from apps.website.media_gc import collect_orphans
+
+
+class Command(BaseCommand):
+    help = 'Reports (dry run) or deletes files in MEDIA_ROOT that no database row refers to'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete', action='store_true', help='Delete the orphaned files (default: dry run)')
+        parser.add_argument('--min-age', type=float, default=24, help='Only files last modified more than this many hours ago')
+        parser.add_argument('--workers', type=int, default=8, help='Parallel deletions')
+        parser.add_argument('--on-disk-index', action='store_true', help='Keep the referenced paths in a temporary SQLite index instead of memory')
+        parser.add_argument('--list', action='store_true', help='Print every orphaned path (with --json: as "paths" in the summary)')
+        parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+
+    def handle(self, *args, **options):
+        paths = []
+        report = None
+        if options['list']:
+            report = paths.append if options['json'] else self.stdout.write
+        summary = collect_orphans(
+            min_age=int(options['min_age'] * 3600),
+            delete=options['delete'],
+            workers=options['workers'],
+            on_disk=options['on_disk_index'],
+            report=report,
+        )
+        if options['json']:
+            if options['list']:
+                summary['paths'] = paths
+            self.stdout.write(json.dumps(summary))
+            return
+        action = 'deleted' if options['delete'] else 'would be deleted (dry run)'
+        self.stdout.write(
+            f"{summary['scanned']} files scanned, {summary['referenced']} paths referenced, "
+            f"{summary['skipped_recent']} recent files skipped"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['orphaned']} orphaned files ({summary['orphaned_bytes']} bytes) {action}"
+        ))
@@ -0,0 +1,55 @@
+from concurrent.futures import ProcessPoolExecutor
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from apps.website.imaging import METADATA_MODELS, read_image_metadata
+from apps.website.snapshots import rebuild_snapshots
+from apps.website.versioning import bump_version
+
+
+def read_metadata(path):
+    """Runs in the worker processes: plain Pillow on a file path."""
+    try:
+        return read_image_metadata(path)
+    except Exception as error:
+        return {'error': str(error)}
+
+
+class Command(BaseCommand):
+    help = 'Fills width, height, size, MIME type and average colour of stored images in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+        parser.add_argument('--batch-size', type=int, default=200, help='Rows read and updated per batch')
+        parser.add_argument('--force', action='store_true', help='Re-read images that already have metadata')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            for label in METADATA_MODELS:
+                model = apps.get_model(label)
+                queryset = model.objects.exclude(image='').exclude(image__isnull=True).order_by('pk')
+                if not options['force']:
+                    queryset = queryset.filter(width__isnull=True)
+                rows = list(queryset.values_list('pk', 'image'))
+                done = failed = 0
+                for start in range(0, len(rows), batch_size):
+                    batch = rows[start:start + batch_size]
+                    paths = [default_storage.path(name) for pk, name in batch]
+                    instances = []
+                    for (pk, name), path, metadata in zip(batch, paths, executor.map(read_metadata, paths, chunksize=8)):
+                        if 'error' in metadata:
+                            failed += 1
+                            self.stderr.write(f'{label} #{pk} ({name}): {metadata["error"]}')
+                            continue
+                        instances.append(model(pk=pk, size=default_storage.size(name), **metadata))
+                    model.objects.bulk_update(instances, ['width', 'height', 'size', 'mime_type', 'color'])
+                    done += len(instances)
+                    if hasattr(model, 'project'):
+                        project_ids = model.objects.filter(
+                            pk__in=[instance.pk for instance in instances]
+                        ).values_list('project_id', flat=True).distinct()
+                        rebuild_snapshots([pk for pk in project_ids if pk])
+                if done:
+                    bump_version(model)
+                self.stdout.write(self.style.SUCCESS(f'{label}: {done} images updated, {failed} failed'))
@@ -0,0 +1,36 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.website.imaging import VARIANT_MODELS, make_placeholder, open_image
+
+
+class Command(BaseCommand):
+    help = 'Computes the inline placeholders of uploaded images that have none'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Images saved per transaction')
+        parser.add_argument('--force', action='store_true', help='Recompute existing placeholders too')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for label in VARIANT_MODELS:
+            model = apps.get_model(label)
+            queryset = model.objects.exclude(image='').exclude(image__isnull=True).order_by('pk')
+            if not options['force']:
+                queryset = queryset.filter(placeholder='')
+            pks = list(queryset.values_list('pk', flat=True))
+            done = failed = 0
+            for start in range(0, len(pks), batch_size):
+                # One transaction per batch, so snapshot rebuilds run once per batch
+                with transaction.atomic():
+                    for instance in model.objects.filter(pk__in=pks[start:start + batch_size]):
+                        try:
+                            image = open_image(instance.image.name, instance.image.storage)
+                        except (OSError, ValueError) as error:
+                            failed += 1
+                            self.stderr.write(f'{label} #{instance.pk}: {error}')
+                            continue
+                        instance.placeholder = make_placeholder(image)
+                        instance.save(update_fields=['placeholder'])
+                        done += 1
+            self.stdout.write(self.style.SUCCESS(f'{label}: {done} placeholders computed, {failed} failed'))
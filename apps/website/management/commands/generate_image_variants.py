@@ -0,0 +1,23 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from apps.website.imaging import VARIANT_MODELS, needs_variants, refresh_variants
+
+
+class Command(BaseCommand):
+    help = 'Generates the responsive variants of uploaded images that have none or outdated ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate variants that are up to date too')
+
+    def handle(self, *args, **options):
+        for label in VARIANT_MODELS:
+            model = apps.get_model(label)
+            generated = 0
+            for instance in model.objects.exclude(image='').exclude(image__isnull=True).order_by('pk').iterator():
+                if options['force']:
+                    model.objects.filter(pk=instance.pk).update(variants={})
+                elif not needs_variants(instance):
+                    continue
+                refresh_variants(label, instance.pk)
+                generated += 1
+            self.stdout.write(self.style.SUCCESS(f'{label}: generated variants for {generated} images'))
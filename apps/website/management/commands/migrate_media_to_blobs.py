@@ -0,0 +1,76 @@
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.website.blobs import BLOB_FIELDS, recount_blobs
+from apps.website.imaging import delete_variants
+from apps.website.snapshots import rebuild_snapshots
+from apps.website.storage import BLOB_PREFIX, blob_storage
+from apps.website.versioning import bump_version
+
+
+class Command(BaseCommand):
+    help = 'Moves uploaded files stored under their original names into the content-addressed blob storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Rows updated per transaction')
+        parser.add_argument('--delete-originals', action='store_true', help='Delete the old files once no row uses them')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        originals = set()
+        replaced_variants = []
+        shared_variants = {}
+        project_ids = set()
+        for label, field in BLOB_FIELDS.items():
+            model = apps.get_model(label)
+            has_variants = hasattr(model, 'variants')
+            queryset = (
+                model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+                .exclude(**{f'{field}__startswith': BLOB_PREFIX}).order_by('pk')
+            )
+            pks = list(queryset.values_list('pk', flat=True))
+            moved = missing = 0
+            for start in range(0, len(pks), batch_size):
+                with transaction.atomic():
+                    for instance in model.objects.filter(pk__in=pks[start:start + batch_size]):
+                        name = getattr(instance, field).name
+                        if not default_storage.exists(name):
+                            missing += 1
+                            self.stderr.write(f'{label} #{instance.pk}: {name} not found')
+                            continue
+                        with default_storage.open(name, 'rb') as file:
+                            new_name = blob_storage.save(name, file)
+                        values = {field: new_name}
+                        if has_variants and instance.variants:
+                            if new_name in shared_variants:
+                                # Same content already moved for another row: share its variants
+                                replaced_variants.append(instance.variants)
+                                values['variants'], values['placeholder'] = shared_variants[new_name]
+                            else:
+                                values['variants'] = {**instance.variants, 'source': new_name}
+                                shared_variants[new_name] = (values['variants'], instance.placeholder)
+                        model.objects.filter(pk=instance.pk).update(**values)
+                        originals.add(name)
+                        if hasattr(instance, 'project_id'):
+                            project_ids.add(instance.project_id)
+                        moved += 1
+            if moved:
+                bump_version(model)
+            self.stdout.write(self.style.SUCCESS(f'{label}: {moved} files moved, {missing} missing'))
+
+        blobs = recount_blobs()
+        rebuild_snapshots([pk for pk in project_ids if pk])
+        self.stdout.write(f'{blobs} blobs referenced')
+
+        if options['delete_originals']:
+            referenced = set()
+            for label, field in BLOB_FIELDS.items():
+                referenced.update(apps.get_model(label).objects.filter(**{f'{field}__in': originals}).values_list(field, flat=True))
+            deleted = 0
+            for name in originals - referenced:
+                default_storage.delete(name)
+                deleted += 1
+            for variants in replaced_variants:
+                delete_variants(variants)
+            self.stdout.write(f'{deleted} original files deleted')
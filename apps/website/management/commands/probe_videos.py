@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from apps.website.models import ProjectVideo
+from apps.website.video import needs_probe, refresh_video_probe
+
+
+class Command(BaseCommand):
+    help = 'Reads duration, codec, dimensions and bitrate of uploaded videos and extracts their posters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Probe videos that were probed already too')
+
+    def handle(self, *args, **options):
+        probed = 0
+        if options['force']:
+            ProjectVideo.objects.update(probed_file='')
+        for instance in ProjectVideo.objects.exclude(video='').exclude(video__isnull=True).order_by('pk').iterator():
+            if not needs_probe(instance):
+                continue
+            refresh_video_probe(instance.pk)
+            probed += 1
+        self.stdout.write(self.style.SUCCESS(f'{probed} videos probed'))
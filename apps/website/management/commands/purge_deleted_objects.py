@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apps.website.deletion import purge_pending_deletions
+
+
+class Command(BaseCommand):
+    help = 'Finishes the background purges of deleted projects and galleries left unfinished (e.g. by a restart)'
+
+    def handle(self, *args, **options):
+        count = purge_pending_deletions()
+        self.stdout.write(self.style.SUCCESS(f'{count} deleted objects purged'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from apps.website.uploads import purge_upload_sessions
+
+
+class Command(BaseCommand):
+    help = 'Deletes abandoned and consumed resumable upload sessions with their partial files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=int, default=None, help='Seconds since the last chunk (default: UPLOAD_SESSION_MAX_AGE)')
+
+    def handle(self, *args, **options):
+        count = purge_upload_sessions(options['max_age'])
+        self.stdout.write(self.style.SUCCESS(f'{count} upload sessions deleted'))
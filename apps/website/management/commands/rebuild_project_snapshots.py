@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from apps.website.models import Project
+from apps.website.snapshots import rebuild_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the stored API snapshots of all projects'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Projects rebuilt per batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        project_ids = list(Project.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(project_ids), batch_size):
+            rebuild_snapshots(project_ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(project_ids)} project snapshots'))
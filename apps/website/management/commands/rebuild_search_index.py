@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from apps.website.models import Project, Service
+from apps.website.search import index_projects, index_services
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text and fuzzy search indexes of all projects and services'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Objects indexed per batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for label, model, index in [('projects', Project, index_projects), ('services', Service, index_services)]:
+            object_ids = list(model.objects.order_by('pk').values_list('pk', flat=True))
+            for start in range(0, len(object_ids), batch_size):
+                index(object_ids[start:start + batch_size])
+            self.stdout.write(self.style.SUCCESS(f'Indexed {len(object_ids)} {label}'))
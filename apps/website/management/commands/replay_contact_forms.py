@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apps.website.ingestion import replay_spool
+
+
+class Command(BaseCommand):
+    help = 'Saves the buffered contact forms a stopped process left in the spool (also done at startup)'
+
+    def handle(self, *args, **options):
+        count = replay_spool()
+        self.stdout.write(self.style.SUCCESS(f'{count} spooled contact forms replayed'))
@@ -0,0 +1,333 @@
+import hashlib
+import hmac
+import mimetypes
+import os
+import re
+import threading
+import time
+from urllib.parse import quote
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse, HttpResponseForbidden, HttpResponseNotFound
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from PIL import Image, features
+from .imaging import FORMATS, encode_image, open_image, resize_image
+from .storage import is_blob
+
+
+# <width>x<height>[-crop]; 0 leaves a side unconstrained
+RESIZE_SPEC = re.compile(r'^(\d{1,5})x(\d{1,5})(-crop)?$')
+
+RESIZABLE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif', '.bmp', '.tif', '.tiff'}
+
+# Sources that may be transparent fall back to PNG instead of JPEG
+ALPHA_EXTENSIONS = {'.png', '.gif', '.webp', '.avif'}
+
+RESIZE_LOCK_TIMEOUT = 30
+
+# bytes=<start>-<end>, bytes=<start>- or bytes=-<suffix length>; only single ranges are served
+BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+_signer = signing.Signer(salt='website.media.resize')
+
+
+def sign_resize(spec, path):
+    """``?s=`` value that allows ``spec`` (outside ``IMAGE_RESIZE_PRESETS``) for ``path``."""
+    return _signer.signature(f'{spec}/{path}')
+
+
+def choose_format(accept, source_extension):
+    """Best output format the client accepts: AVIF, then WebP, then JPEG (PNG for transparent sources)."""
+    for fmt in ['avif', 'webp']:
+        if FORMATS[fmt][2] in accept and features.check(fmt):
+            return fmt
+    return 'png' if source_extension in ALPHA_EXTENSIONS else 'jpeg'
+
+
+class DiskLRUCache:
+    """
+    Files under ``directory`` kept below ``max_size`` bytes. Hits refresh the
+    file mtime; when the total grows past the limit the least recently used
+    files are removed down to 90% of it. Writes are atomic (temp file and
+    rename), so concurrent readers never see partial files.
+    """
+
+    def __init__(self, directory, max_size):
+        self.directory = str(directory)
+        self.max_size = max_size
+        self._size = None
+        self._lock = threading.Lock()
+
+    def path(self, key, extension):
+        return os.path.join(self.directory, key[:2], f'{key}.{extension}')
+
+    def get(self, key, extension):
+        path = self.path(key, extension)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, extension, data):
+        path = self.path(key, extension)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+        os.replace(temp_path, path)
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan()[1]
+            else:
+                self._size += len(data)
+            over_limit = self._size > self.max_size
+        if over_limit:
+            self.evict()
+        return path
+
+    def _scan(self):
+        files = []
+        total = 0
+        if not os.path.isdir(self.directory):
+            return files, total
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        return files, total
+
+    def evict(self):
+        with self._lock:
+            files, total = self._scan()
+            target = self.max_size * 0.9
+            for mtime, size, path in sorted(files):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+            self._size = total
+
+
+resize_cache = DiskLRUCache(settings.IMAGE_RESIZE_CACHE_DIR, settings.IMAGE_RESIZE_CACHE_SIZE)
+
+
+def get_or_render(key, extension, render):
+    """
+    Path of the cached rendition ``key``, rendering it with ``render()`` on
+    a miss. Concurrent misses for one key are coalesced: one request
+    renders (``add``-based lock), the others wait for its file.
+    """
+    path = resize_cache.get(key, extension)
+    if path:
+        return path
+    lock_key = f'media-resize:{key}'
+    if cache.add(lock_key, 1, RESIZE_LOCK_TIMEOUT):
+        try:
+            return resize_cache.put(key, extension, render())
+        finally:
+            cache.delete(lock_key)
+    deadline = time.time() + RESIZE_LOCK_TIMEOUT
+    while time.time() < deadline:
+        time.sleep(0.05)
+        path = resize_cache.get(key, extension)
+        if path:
+            return path
+        if not cache.get(lock_key):
+            break
+    return resize_cache.put(key, extension, render())
+
+
+def resize_view(request, spec, path):
+    """
+    ``/media/resize/<W>x<H>[-crop]/<path>``: a stored image resized (never
+    upscaled) and converted to the best format in ``Accept``. Specs outside
+    ``IMAGE_RESIZE_PRESETS`` need the ``?s=`` signature of ``sign_resize``.
+    Renditions are kept in an LRU disk cache keyed on the source file's
+    size and mtime, so replaced files are re-rendered. Errors are returned,
+    not raised (``JsonErrorResponseMiddleware`` turns exceptions into 500s):
+    404 for a missing source, 422 for one that can't be decoded or is too
+    large.
+    """
+    match = RESIZE_SPEC.match(spec)
+    if not match:
+        return HttpResponseNotFound('Unknown resize spec')
+    signature = request.GET.get('s', '').encode('utf-8')
+    if spec not in settings.IMAGE_RESIZE_PRESETS and not hmac.compare_digest(signature, sign_resize(spec, path).encode('utf-8')):
+        return HttpResponseForbidden('Resize spec is not allowed')
+    width, height, crop = int(match[1]), int(match[2]), bool(match[3])
+    max_size = settings.IMAGE_RESIZE_MAX_SIZE
+    if not (width or height) or width > max_size or height > max_size:
+        return HttpResponseNotFound('Unsupported size')
+
+    try:
+        source = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        return HttpResponseNotFound('Invalid path')
+    extension = os.path.splitext(source)[1].lower()
+    if extension not in RESIZABLE_EXTENSIONS or not os.path.isfile(source):
+        return HttpResponseNotFound('Image not found')
+    stat = os.stat(source)
+
+    fmt = choose_format(request.META.get('HTTP_ACCEPT', ''), extension)
+    quality = settings.IMAGE_VARIANT_QUALITY
+    key = hashlib.sha256(
+        f'{path}|{stat.st_size}|{stat.st_mtime_ns}|{spec}|{fmt}|{quality}'.encode('utf-8')
+    ).hexdigest()
+    etag = f'"{key[:32]}"'
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        def render():
+            image = resize_image(open_image(path, width=width, height=height, crop=crop), width, height, crop)
+            return encode_image(image, fmt, quality)
+
+        file_extension = FORMATS[fmt][1]
+        try:
+            try:
+                file = open(get_or_render(key, file_extension, render), 'rb')
+            except FileNotFoundError:
+                # Evicted between rendering and opening
+                file = open(resize_cache.put(key, file_extension, render()), 'rb')
+        except FileNotFoundError:
+            return HttpResponseNotFound('Image not found')
+        except (OSError, ValueError, Image.DecompressionBombError):
+            # Corrupt or truncated source (UnidentifiedImageError is an OSError) or above IMAGE_MAX_PIXELS
+            return HttpResponse('Image can not be decoded', status=422)
+        response = FileResponse(file, content_type=FORMATS[fmt][2])
+        response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=settings.IMAGE_RESIZE_MAX_AGE)
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+class RangeFile:
+    """
+    Read-only view of ``length`` bytes of an open file from its current
+    position. ``fileno`` stays available, so WSGI servers with a
+    ``wsgi.file_wrapper`` (gunicorn, uWSGI) send the range with
+    ``os.sendfile`` using the response Content-Length.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """``(start, end)`` (inclusive) of a single-range ``Range`` header, ``None`` to ignore it, ``False`` if unsatisfiable."""
+    match = BYTE_RANGE.match(header.replace(' ', ''))
+    if not match or not (match[1] or match[2]):
+        return None
+    if not match[1]:
+        length = int(match[2])
+        if not length or not size:
+            return False
+        return max(0, size - length), size - 1
+    start = int(match[1])
+    if start >= size:
+        return False
+    end = int(match[2]) if match[2] else size - 1
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def serve_media(request, path):
+    """
+    ``/media/<path>``: a stored file with a strong ETag, Last-Modified,
+    ``Cache-Control`` (``immutable`` for content-addressed blobs) and single
+    byte-range (206) support, so video can be seeked. File bodies go out as ``FileResponse``, which WSGI servers
+    stream with ``os.sendfile``; with ``MEDIA_OFFLOAD`` the front server
+    sends the file (and handles ranges) via X-Accel-Redirect / X-Sendfile
+    and the worker is freed right away.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        return HttpResponseNotFound('Invalid path')
+    try:
+        stat = os.stat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        return HttpResponseNotFound('File not found')
+    if not os.path.isfile(full_path):
+        return HttpResponseNotFound('File not found')
+
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    last_modified = int(stat.st_mtime)
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        if settings.MEDIA_OFFLOAD == 'x-accel-redirect':
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = quote(settings.MEDIA_OFFLOAD_PREFIX.rstrip('/') + '/' + path)
+        elif settings.MEDIA_OFFLOAD == 'x-sendfile':
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = full_path
+        else:
+            response = _file_response(request, full_path, stat.st_size, content_type, etag, last_modified)
+    # Also on 304: it must carry the validators and caching headers of the 200 (RFC 9110 15.4.5)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if is_blob(path):
+        # Content-addressed: the URL changes whenever the content does
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_MAX_AGE)
+    return response
+
+
+def _file_response(request, full_path, size, content_type, etag, last_modified):
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and (not if_range or if_range in (etag, http_date(last_modified))):
+        byte_range = parse_range(range_header, size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        file.seek(start)
+        response = FileResponse(RangeFile(file, end - start + 1), status=206, content_type=content_type)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
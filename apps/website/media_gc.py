@@ -0,0 +1,239 @@
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+from .models import MediaBlob, ProjectVideo
+
+
+# Rows read per query while streaming referenced paths
+CHUNK_SIZE = 5000
+
+# Candidates checked / deleted per batch
+BATCH_SIZE = 1000
+
+
+def file_fields(root):
+    """
+    ``(model, field name)`` of every FileField / ImageField of the installed
+    models stored under ``root`` (fields of other storages, e.g. exports in
+    ``EXPORT_ROOT``, hold paths relative to another tree).
+    """
+    root = os.path.realpath(root)
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if not isinstance(field, models.FileField):
+                continue
+            location = getattr(field.storage, 'location', None)
+            if location and os.path.realpath(location) == root:
+                yield model, field.name
+
+
+def iter_referenced_paths(root):
+    """
+    Every media path under ``root`` the database refers to: file fields
+    (all rows, through the base manager), image variants, video posters and
+    counted blobs.
+    """
+    for model, name in file_fields(root):
+        yield from (
+            model._base_manager.exclude(**{name: ''}).exclude(**{f'{name}__isnull': True})
+            .values_list(name, flat=True).iterator(chunk_size=CHUNK_SIZE)
+        )
+    for model in apps.get_models():
+        if any(field.name == 'variants' for field in model._meta.get_fields()):
+            for variants in model._base_manager.exclude(variants={}).values_list('variants', flat=True).iterator(chunk_size=CHUNK_SIZE):
+                for sizes in (variants or {}).get('files', {}).values():
+                    yield from sizes.values()
+    yield from ProjectVideo._base_manager.exclude(poster='').values_list('poster', flat=True).iterator(chunk_size=CHUNK_SIZE)
+    yield from MediaBlob.objects.filter(ref_count__gt=0).values_list('name', flat=True).iterator(chunk_size=CHUNK_SIZE)
+
+
+class MemoryIndex:
+    """Referenced paths in a set: fastest, about 100 bytes per path."""
+
+    def __init__(self):
+        self.paths = set()
+
+    def add_all(self, paths):
+        self.paths.update(paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def missing(self, paths):
+        return [path for path in paths if path not in self.paths]
+
+    def close(self):
+        self.paths = set()
+
+
+class DiskIndex:
+    """Referenced paths in a temporary SQLite B-tree, for trees too large to hold in memory."""
+
+    def __init__(self, directory=None):
+        self.file = tempfile.NamedTemporaryFile(suffix='.sqlite3', dir=directory, delete=False)
+        self.file.close()
+        self.connection = sqlite3.connect(self.file.name)
+        self.connection.execute('PRAGMA journal_mode = OFF')
+        self.connection.execute('PRAGMA synchronous = OFF')
+        self.connection.execute('CREATE TABLE paths (path TEXT PRIMARY KEY) WITHOUT ROWID')
+        self.count = 0
+
+    def add_all(self, paths):
+        batch = []
+        for path in paths:
+            batch.append((path,))
+            if len(batch) == CHUNK_SIZE:
+                self._insert(batch)
+                batch = []
+        self._insert(batch)
+        self.connection.commit()
+
+    def _insert(self, batch):
+        cursor = self.connection.executemany('INSERT OR IGNORE INTO paths VALUES (?)', batch)
+        self.count += cursor.rowcount
+
+    def __len__(self):
+        return self.count
+
+    def missing(self, paths):
+        found = set()
+        # Below SQLite's default limit of 999 bound parameters
+        for start in range(0, len(paths), 900):
+            chunk = paths[start:start + 900]
+            placeholders = ','.join('?' * len(chunk))
+            found.update(row[0] for row in self.connection.execute(f'SELECT path FROM paths WHERE path IN ({placeholders})', chunk))
+        return [path for path in paths if path not in found]
+
+    def close(self):
+        self.connection.close()
+        os.remove(self.file.name)
+
+
+def excluded_directories(root):
+    """Relative paths of directories under ``root`` that hold working files, not media (caches, partial uploads)."""
+    excluded = set()
+    root = os.path.realpath(root)
+    for directory in [settings.IMAGE_RESIZE_CACHE_DIR, settings.UPLOAD_SESSION_DIR]:
+        directory = os.path.realpath(str(directory))
+        if directory.startswith(root + os.sep):
+            excluded.add(os.path.relpath(directory, root).replace(os.sep, '/'))
+    return excluded
+
+
+def walk_files(root, excluded=()):
+    """Relative ``/``-separated paths of the regular files under ``root``, with ``os.scandir`` and no recursion."""
+    stack = ['']
+    while stack:
+        relative = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(root, relative))
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+        with entries:
+            for entry in entries:
+                path = f'{relative}/{entry.name}' if relative else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if path not in excluded:
+                        stack.append(path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield path
+
+
+def still_referenced(root, paths):
+    """Paths of ``paths`` referenced by a file field right now (re-checked just before deleting)."""
+    referenced = set()
+    for model, name in file_fields(root):
+        referenced.update(model._base_manager.filter(**{f'{name}__in': paths}).values_list(name, flat=True))
+    referenced.update(MediaBlob.objects.filter(name__in=paths, ref_count__gt=0).values_list('name', flat=True))
+    return referenced
+
+
+def _remove(root, path):
+    try:
+        os.remove(os.path.join(root, path))
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _prune_directories(root, directories):
+    """Removes the now empty directories of deleted files, deepest first."""
+    for directory in sorted(directories, key=lambda path: path.count('/'), reverse=True):
+        while directory:
+            try:
+                os.rmdir(os.path.join(root, directory))
+            except OSError:
+                break
+            directory = directory.rpartition('/')[0]
+
+
+def collect_orphans(root=None, min_age=86400, delete=False, workers=8, on_disk=False, report=None):
+    """
+    Finds (and with ``delete`` removes) files under ``root`` that nothing in
+    the database refers to and that are older than ``min_age`` seconds, so
+    uploads in flight are never touched. Returns the summary dict.
+
+    ``report`` is called with each orphaned path. Deletions run in a thread
+    pool and each batch is re-checked against the file fields first.
+    """
+    root = str(root or settings.MEDIA_ROOT)
+    started = time.monotonic()
+    cutoff = time.time() - min_age
+    summary = {
+        'root': root, 'dry_run': not delete, 'min_age': min_age,
+        'referenced': 0, 'scanned': 0, 'orphaned': 0, 'orphaned_bytes': 0,
+        'skipped_recent': 0, 'deleted': 0, 'deleted_bytes': 0, 'errors': 0,
+    }
+    index = DiskIndex() if on_disk else MemoryIndex()
+    try:
+        index.add_all(iter_referenced_paths(root))
+        summary['referenced'] = len(index)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            def process(batch):
+                orphans = []
+                for path in index.missing(batch):
+                    try:
+                        stat = os.stat(os.path.join(root, path))
+                    except OSError:
+                        summary['errors'] += 1
+                        continue
+                    if stat.st_mtime > cutoff:
+                        summary['skipped_recent'] += 1
+                        continue
+                    orphans.append((path, stat.st_size))
+                if delete and orphans:
+                    referenced = still_referenced(root, [path for path, size in orphans])
+                    orphans = [(path, size) for path, size in orphans if path not in referenced]
+                for path, size in orphans:
+                    summary['orphaned'] += 1
+                    summary['orphaned_bytes'] += size
+                    if report:
+                        report(path)
+                if delete and orphans:
+                    removed = executor.map(lambda path: _remove(root, path), [path for path, size in orphans])
+                    directories = set()
+                    for (path, size), was_removed in zip(orphans, removed):
+                        if was_removed:
+                            summary['deleted'] += 1
+                            summary['deleted_bytes'] += size
+                            directories.add(path.rpartition('/')[0])
+                    _prune_directories(root, directories - {''})
+
+            batch = []
+            for path in walk_files(root, excluded_directories(root)):
+                summary['scanned'] += 1
+                batch.append(path)
+                if len(batch) == BATCH_SIZE:
+                    process(batch)
+                    batch = []
+            process(batch)
+    finally:
+        index.close()
+    summary['elapsed'] = round(time.monotonic() - started, 3)
+    return summary
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0012_remove_projectvideo_project_item_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='snapshot',
+            field=models.JSONField(blank=True, editable=False, null=True, verbose_name='Снимок API'),
+        ),
+    ]
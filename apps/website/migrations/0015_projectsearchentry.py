@@ -0,0 +1,123 @@
+# Generated by Django 5.2.6 on 2026-10-17 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+SEARCH_FIELDS = ['name', 'brand', 'country', 'description', 'short_description']
+
+SQLITE_CREATE = [
+    """
+    CREATE VIRTUAL TABLE website_projectsearchentry_fts USING fts5(
+        name, brand, country, description, short_description,
+        content='website_projectsearchentry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER website_projectsearchentry_ai AFTER INSERT ON website_projectsearchentry BEGIN
+        INSERT INTO website_projectsearchentry_fts(rowid, name, brand, country, description, short_description)
+        VALUES (new.id, new.name, new.brand, new.country, new.description, new.short_description);
+    END
+    """,
+    """
+    CREATE TRIGGER website_projectsearchentry_ad AFTER DELETE ON website_projectsearchentry BEGIN
+        INSERT INTO website_projectsearchentry_fts(website_projectsearchentry_fts, rowid, name, brand, country, description, short_description)
+        VALUES ('delete', old.id, old.name, old.brand, old.country, old.description, old.short_description);
+    END
+    """,
+    """
+    CREATE TRIGGER website_projectsearchentry_au AFTER UPDATE ON website_projectsearchentry BEGIN
+        INSERT INTO website_projectsearchentry_fts(website_projectsearchentry_fts, rowid, name, brand, country, description, short_description)
+        VALUES ('delete', old.id, old.name, old.brand, old.country, old.description, old.short_description);
+        INSERT INTO website_projectsearchentry_fts(rowid, name, brand, country, description, short_description)
+        VALUES (new.id, new.name, new.brand, new.country, new.description, new.short_description);
+    END
+    """,
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS website_projectsearchentry_au",
+    "DROP TRIGGER IF EXISTS website_projectsearchentry_ad",
+    "DROP TRIGGER IF EXISTS website_projectsearchentry_ai",
+    "DROP TABLE IF EXISTS website_projectsearchentry_fts",
+]
+
+POSTGRESQL_CREATE = [
+    """
+    ALTER TABLE website_projectsearchentry ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(brand, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(country, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(short_description, '')), 'C') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX website_projectsearchentry_vector_idx ON website_projectsearchentry USING GIN (search_vector)",
+    "CREATE INDEX website_projectsearchentry_name_idx ON website_projectsearchentry USING GIN (to_tsvector('simple', coalesce(name, '')))",
+    "CREATE INDEX website_projectsearchentry_brand_idx ON website_projectsearchentry USING GIN (to_tsvector('simple', coalesce(brand, '')))",
+]
+
+POSTGRESQL_DROP = [
+    "DROP INDEX IF EXISTS website_projectsearchentry_brand_idx",
+    "DROP INDEX IF EXISTS website_projectsearchentry_name_idx",
+    "DROP INDEX IF EXISTS website_projectsearchentry_vector_idx",
+    "ALTER TABLE website_projectsearchentry DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_CREATE, 'postgresql': POSTGRESQL_CREATE})
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_DROP, 'postgresql': POSTGRESQL_DROP})
+
+
+def populate_search_index(apps, schema_editor):
+    ProjectTranslation = apps.get_model('website', 'ProjectTranslation')
+    ProjectSearchEntry = apps.get_model('website', 'ProjectSearchEntry')
+    entries = [
+        ProjectSearchEntry(
+            project_id=translation.master_id,
+            language_code=translation.language_code,
+            **{field: (getattr(translation, field) or '').casefold() for field in SEARCH_FIELDS}
+        )
+        for translation in ProjectTranslation.objects.iterator()
+    ]
+    ProjectSearchEntry.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0014_contentversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectSearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language_code', models.CharField(max_length=15, verbose_name='Язык')),
+                ('name', models.TextField(blank=True, default='', verbose_name='Название')),
+                ('brand', models.TextField(blank=True, default='', verbose_name='Бренд')),
+                ('country', models.TextField(blank=True, default='', verbose_name='Страна')),
+                ('description', models.TextField(blank=True, default='', verbose_name='Описание')),
+                ('short_description', models.TextField(blank=True, default='', verbose_name='Краткое описание')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='website.project', verbose_name='Проект')),
+            ],
+            options={
+                'verbose_name': 'Поисковый индекс проекта',
+                'verbose_name_plural': 'Поисковый индекс проектов',
+                'unique_together': {('project', 'language_code')},
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(populate_search_index, migrations.RunPython.noop),
+    ]
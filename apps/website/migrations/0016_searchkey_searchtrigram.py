@@ -0,0 +1,73 @@
+# Generated by Django 5.2.6 on 2026-10-17 10:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.website.transliteration import normalize_key, trigrams
+
+
+def populate_search_keys(apps, schema_editor):
+    SearchKey = apps.get_model('website', 'SearchKey')
+    SearchTrigram = apps.get_model('website', 'SearchTrigram')
+    sources = [
+        ('project', apps.get_model('website', 'ProjectTranslation')),
+        ('service', apps.get_model('website', 'ServiceTranslation')),
+    ]
+    for kind, Translation in sources:
+        for translation in Translation.objects.iterator():
+            key = normalize_key(translation.name)[:255]
+            if not key:
+                continue
+            key_trigrams = trigrams(key)
+            search_key = SearchKey.objects.create(
+                kind=kind,
+                object_id=translation.master_id,
+                language_code=translation.language_code,
+                key=key,
+                trigram_count=len(key_trigrams)
+            )
+            SearchTrigram.objects.bulk_create([
+                SearchTrigram(search_key=search_key, kind=kind, trigram=trigram)
+                for trigram in key_trigrams
+            ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0015_projectsearchentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('project', 'Project'), ('service', 'Service')], max_length=20, verbose_name='Тип')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='ID объекта')),
+                ('language_code', models.CharField(max_length=15, verbose_name='Язык')),
+                ('key', models.CharField(max_length=255, verbose_name='Ключ поиска')),
+                ('trigram_count', models.PositiveIntegerField(default=0, verbose_name='Количество триграмм')),
+            ],
+            options={
+                'verbose_name': 'Ключ поиска',
+                'verbose_name_plural': 'Ключи поиска',
+                'unique_together': {('kind', 'object_id', 'language_code')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20, verbose_name='Тип')),
+                ('trigram', models.CharField(max_length=3, verbose_name='Триграмма')),
+                ('search_key', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='website.searchkey', verbose_name='Ключ поиска')),
+            ],
+            options={
+                'verbose_name': 'Триграмма',
+                'verbose_name_plural': 'Триграммы',
+                'indexes': [models.Index(fields=['kind', 'trigram'], name='website_trigram_kind_idx')],
+            },
+        ),
+        migrations.RunPython(populate_search_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0017_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='galleryimage',
+            name='placeholder',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Заглушка изображения'),
+        ),
+        migrations.AddField(
+            model_name='projectimage',
+            name='placeholder',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Заглушка изображения'),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='placeholder',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Заглушка изображения'),
+        ),
+        migrations.AddField(
+            model_name='teammember',
+            name='placeholder',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Заглушка изображения'),
+        ),
+    ]
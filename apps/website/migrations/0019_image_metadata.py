@@ -0,0 +1,63 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0018_image_placeholder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='galleryimage',
+            name='color',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=7, verbose_name='Средний цвет'),
+        ),
+        migrations.AddField(
+            model_name='galleryimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True, verbose_name='Высота'),
+        ),
+        migrations.AddField(
+            model_name='galleryimage',
+            name='mime_type',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=50, verbose_name='MIME-тип'),
+        ),
+        migrations.AddField(
+            model_name='galleryimage',
+            name='size',
+            field=models.PositiveBigIntegerField(blank=True, db_index=True, editable=False, null=True, verbose_name='Размер файла (байт)'),
+        ),
+        migrations.AddField(
+            model_name='galleryimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True, verbose_name='Ширина'),
+        ),
+        migrations.AddField(
+            model_name='projectimage',
+            name='color',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=7, verbose_name='Средний цвет'),
+        ),
+        migrations.AddField(
+            model_name='projectimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True, verbose_name='Высота'),
+        ),
+        migrations.AddField(
+            model_name='projectimage',
+            name='mime_type',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=50, verbose_name='MIME-тип'),
+        ),
+        migrations.AddField(
+            model_name='projectimage',
+            name='size',
+            field=models.PositiveBigIntegerField(blank=True, db_index=True, editable=False, null=True, verbose_name='Размер файла (байт)'),
+        ),
+        migrations.AddField(
+            model_name='projectimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True, verbose_name='Ширина'),
+        ),
+    ]
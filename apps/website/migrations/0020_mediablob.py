@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:00
+
+import apps.website.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0019_image_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Путь')),
+                ('size', models.PositiveBigIntegerField(default=0, verbose_name='Размер (байт)')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='Количество ссылок')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'Файл медиа',
+                'verbose_name_plural': 'Файлы медиа',
+            },
+        ),
+        migrations.AlterField(
+            model_name='galleryimage',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=apps.website.storage.get_blob_storage, upload_to='gallery/', verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='projectimage',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=apps.website.storage.get_blob_storage, upload_to='projects/', verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='projectvideo',
+            name='video',
+            field=models.FileField(blank=True, null=True, storage=apps.website.storage.get_blob_storage, upload_to='projects/', verbose_name='Видео'),
+        ),
+        migrations.AlterField(
+            model_name='service',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=apps.website.storage.get_blob_storage, upload_to='services/', verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='teammember',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=apps.website.storage.get_blob_storage, upload_to='team/', verbose_name='Изображение'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:00
+
+import apps.website.imaging
+import apps.website.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0021_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='galleryimage',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=apps.website.storage.get_blob_storage, upload_to='gallery/', validators=[apps.website.imaging.validate_image_pixels], verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='projectimage',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=apps.website.storage.get_blob_storage, upload_to='projects/', validators=[apps.website.imaging.validate_image_pixels], verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='service',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=apps.website.storage.get_blob_storage, upload_to='services/', validators=[apps.website.imaging.validate_image_pixels], verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='teammember',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=apps.website.storage.get_blob_storage, upload_to='team/', validators=[apps.website.imaging.validate_image_pixels], verbose_name='Изображение'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0022_image_pixel_limit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectvideo',
+            name='bitrate',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Битрейт (бит/с)'),
+        ),
+        migrations.AddField(
+            model_name='projectvideo',
+            name='codec',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20, verbose_name='Кодек'),
+        ),
+        migrations.AddField(
+            model_name='projectvideo',
+            name='duration',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Длительность (сек)'),
+        ),
+        migrations.AddField(
+            model_name='projectvideo',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота'),
+        ),
+        migrations.AddField(
+            model_name='projectvideo',
+            name='poster',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255, verbose_name='Постер'),
+        ),
+        migrations.AddField(
+            model_name='projectvideo',
+            name='probed_file',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255, verbose_name='Проверенный файл'),
+        ),
+        migrations.AddField(
+            model_name='projectvideo',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:00
+
+import uuid
+from django.db import migrations, models
+
+
+def populate_submission_ids(apps, schema_editor):
+    ContactForm = apps.get_model('website', 'ContactForm')
+    forms = list(ContactForm.objects.only('pk'))
+    for form in forms:
+        form.submission_id = uuid.uuid4()
+    ContactForm.objects.bulk_update(forms, ['submission_id'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0025_dataexport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactform',
+            name='submission_id',
+            field=models.UUIDField(editable=False, null=True, verbose_name='ID заявки'),
+        ),
+        migrations.RunPython(populate_submission_ids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='contactform',
+            name='submission_id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='ID заявки'),
+        ),
+    ]
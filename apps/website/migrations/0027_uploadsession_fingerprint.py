@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0026_contactform_submission_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', max_length=160, verbose_name='Отпечаток файла'),
+        ),
+        migrations.AddField(
+            model_name='uploadsession',
+            name='lease_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Запись чанка до'),
+        ),
+    ]
@@ -0,0 +1,170 @@
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+from .caching import get_or_compute, make_cache_key
+from .translations import get_request_languages, translation_prefetch
+from .versioning import get_versions, make_etag
+
+
+class TranslationsViewSetMixin:
+    """
+    Serves only the languages selected by ``?lang=`` / Accept-Language.
+    ``translation_prefetches`` lists the ``...translations`` lookups of the
+    viewset; only the rows of the selected languages (and their parler
+    fallbacks) are loaded.
+    """
+    translation_prefetches = ['translations']
+
+    def get_translation_prefetches(self):
+        return self.translation_prefetches
+
+    def get_languages(self):
+        if not hasattr(self, '_languages'):
+            self._languages = get_request_languages(self.request)
+        return self._languages
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        languages = self.get_languages()
+        return queryset.prefetch_related(*[
+            translation_prefetch(queryset.model, lookup, languages)
+            for lookup in self.get_translation_prefetches()
+        ])
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['languages'] = self.get_languages()
+        return context
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        patch_vary_headers(response, ['Accept-Language'])
+        return response
+
+
+def parse_field_list(value):
+    """``'a,b'`` -> ``['a', 'b']``; ``None`` when the parameter is absent."""
+    if value is None:
+        return None
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class SparseFieldsViewSetMixin:
+    """
+    ``?fields=`` keeps only the listed top-level fields and ``?expand=``
+    embeds only the listed relations (the others become ids or are left
+    out); without them the full representation is returned.
+    ``select_related_lookups``, ``prefetch_lookups`` and the translation
+    prefetches are applied only when the field named by their first segment
+    is rendered in full, so pruned fields cost no queries.
+    Must come before ``TranslationsViewSetMixin``.
+    """
+    select_related_lookups = []
+    prefetch_lookups = []
+
+    def get_requested_fields(self):
+        return parse_field_list(self.request.query_params.get('fields'))
+
+    def get_requested_expand(self):
+        return parse_field_list(self.request.query_params.get('expand'))
+
+    def is_lookup_needed(self, lookup):
+        name = lookup.split('__')[0]
+        fields = self.get_requested_fields()
+        if fields is not None and name not in fields:
+            return False
+        expand = self.get_requested_expand()
+        expandable_fields = getattr(self.get_serializer_class(), 'expandable_fields', {})
+        return expand is None or name not in expandable_fields or name in expand
+
+    def get_translation_prefetches(self):
+        return [lookup for lookup in super().get_translation_prefetches() if self.is_lookup_needed(lookup)]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select_related_lookups = [lookup for lookup in self.select_related_lookups if self.is_lookup_needed(lookup)]
+        if select_related_lookups:
+            queryset = queryset.select_related(*select_related_lookups)
+        return queryset.prefetch_related(*[
+            lookup for lookup in self.prefetch_lookups if self.is_lookup_needed(lookup)
+        ])
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_requested_fields())
+        kwargs.setdefault('expand', self.get_requested_expand())
+        return super().get_serializer(*args, **kwargs)
+
+
+class ConditionalGetMixin:
+    """
+    Answers ``If-None-Match`` / ``If-Modified-Since`` with 304 before any
+    query or serialization runs. The validators come from the change
+    counters of ``version_models``, bumped by model saves and deletes.
+    Requires ``TranslationsViewSetMixin``.
+    """
+    version_models = []
+
+    def get_validators(self):
+        if not hasattr(self, '_validators'):
+            versions, last_modified = get_versions(self.version_models)
+            # The data holds absolute media URLs built from the scheme and host
+            etag = make_etag(
+                versions, self.request.scheme, self.request.get_host(),
+                self.request.get_full_path(), self.get_languages()
+            )
+            self._validators = (etag, last_modified)
+        return self._validators
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is not None:
+            return response
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and not getattr(response, 'is_stale', False):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+
+class CachedResponseMixin:
+    """
+    Caches the response data of ``list`` / ``retrieve`` per scheme, host,
+    path, query parameters and language. Entries are versioned with the ETag of
+    ``ConditionalGetMixin``, so model saves invalidate them; a stale entry
+    is still served while one request recomputes it.
+    """
+    cache_prefix = 'api'
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        key = make_cache_key(self.cache_prefix, request, self.get_languages())
+        computed = []
+
+        def compute():
+            response = handler(request, *args, **kwargs)
+            computed.append(response)
+            return response.data
+
+        data, is_stale = get_or_compute(key, etag, compute)
+        if computed:
+            return computed[0]
+        response = Response(data)
+        if is_stale:
+            response.is_stale = True
+            response['Cache-Control'] = 'no-cache'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
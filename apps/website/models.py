@@ -1,7 +1,11 @@
+import uuid
+from django.conf import settings
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import AbstractUser
 from parler.models import TranslatableModel, TranslatedFields
+from .imaging import validate_image_pixels
+from .storage import get_blob_storage, get_export_storage
 
 class Category(TranslatableModel):
     translations = TranslatedFields(
@@ -43,6 +47,8 @@ class Project(TranslatableModel):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, verbose_name='Категория', null=True, blank=True)
     material = models.CharField(_("Материал"), max_length=255, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания', null=True, blank=True)
+    snapshot = models.JSONField(_("Снимок API"), null=True, blank=True, editable=False)
+    deleted_at = models.DateTimeField(_("Дата удаления"), null=True, blank=True, editable=False, db_index=True)
     
     def __str__(self):
         names = []
@@ -67,9 +73,68 @@ class Project(TranslatableModel):
         verbose_name_plural = '02. Проекты'
         
 
+class ProjectSearchEntry(models.Model):
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='search_entries', verbose_name='Проект')
+    language_code = models.CharField(_("Язык"), max_length=15)
+    name = models.TextField(_("Название"), blank=True, default='')
+    brand = models.TextField(_("Бренд"), blank=True, default='')
+    country = models.TextField(_("Страна"), blank=True, default='')
+    description = models.TextField(_("Описание"), blank=True, default='')
+    short_description = models.TextField(_("Краткое описание"), blank=True, default='')
+    
+    def __str__(self):
+        return f'Search: Project #{self.project_id} ({self.language_code})'
+    
+    class Meta:
+        verbose_name = 'Поисковый индекс проекта'
+        verbose_name_plural = 'Поисковый индекс проектов'
+        unique_together = [('project', 'language_code')]
+
+
+class SearchKey(models.Model):
+    class Kind(models.TextChoices):
+        PROJECT = 'project'
+        SERVICE = 'service'
+    
+    kind = models.CharField(_("Тип"), max_length=20, choices=Kind.choices)
+    object_id = models.PositiveBigIntegerField(_("ID объекта"))
+    language_code = models.CharField(_("Язык"), max_length=15)
+    key = models.CharField(_("Ключ поиска"), max_length=255)
+    trigram_count = models.PositiveIntegerField(_("Количество триграмм"), default=0)
+    
+    def __str__(self):
+        return f'{self.kind} #{self.object_id} ({self.language_code}): {self.key}'
+    
+    class Meta:
+        verbose_name = 'Ключ поиска'
+        verbose_name_plural = 'Ключи поиска'
+        unique_together = [('kind', 'object_id', 'language_code')]
+
+
+class SearchTrigram(models.Model):
+    search_key = models.ForeignKey(SearchKey, on_delete=models.CASCADE, related_name='trigrams', verbose_name='Ключ поиска')
+    kind = models.CharField(_("Тип"), max_length=20)
+    trigram = models.CharField(_("Триграмма"), max_length=3)
+    
+    def __str__(self):
+        return f'{self.kind}: {self.trigram!r}'
+    
+    class Meta:
+        verbose_name = 'Триграмма'
+        verbose_name_plural = 'Триграммы'
+        indexes = [models.Index(fields=['kind', 'trigram'], name='website_trigram_kind_idx')]
+
+
 class ProjectImage(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='images', verbose_name='Проект', null=True, blank=True)
-    image = models.ImageField(upload_to='projects/', verbose_name='Изображение', null=True, blank=True)
+    image = models.ImageField(upload_to='projects/', storage=get_blob_storage, validators=[validate_image_pixels], verbose_name='Изображение', null=True, blank=True)
+    variants = models.JSONField(_("Варианты изображения"), default=dict, blank=True, editable=False)
+    placeholder = models.TextField(_("Заглушка изображения"), blank=True, default='', editable=False)
+    width = models.PositiveIntegerField(_("Ширина"), null=True, blank=True, editable=False, db_index=True)
+    height = models.PositiveIntegerField(_("Высота"), null=True, blank=True, editable=False, db_index=True)
+    size = models.PositiveBigIntegerField(_("Размер файла (байт)"), null=True, blank=True, editable=False, db_index=True)
+    mime_type = models.CharField(_("MIME-тип"), max_length=50, blank=True, default='', editable=False, db_index=True)
+    color = models.CharField(_("Средний цвет"), max_length=7, blank=True, default='', editable=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания', null=True, blank=True)
     
     objects = models.Manager()
@@ -90,7 +155,14 @@ class ProjectImage(models.Model):
 
 class ProjectVideo(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='videos', verbose_name='Проект', null=True, blank=True)
-    video = models.FileField(upload_to='projects/', verbose_name='Видео', null=True, blank=True)
+    video = models.FileField(upload_to='projects/', storage=get_blob_storage, verbose_name='Видео', null=True, blank=True)
+    duration = models.FloatField(_("Длительность (сек)"), null=True, blank=True, editable=False)
+    codec = models.CharField(_("Кодек"), max_length=20, blank=True, default='', editable=False)
+    width = models.PositiveIntegerField(_("Ширина"), null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(_("Высота"), null=True, blank=True, editable=False)
+    bitrate = models.PositiveIntegerField(_("Битрейт (бит/с)"), null=True, blank=True, editable=False)
+    poster = models.CharField(_("Постер"), max_length=255, blank=True, default='', editable=False)
+    probed_file = models.CharField(_("Проверенный файл"), max_length=255, blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания', null=True, blank=True)
     
     objects = models.Manager()
@@ -181,7 +253,9 @@ class Service(TranslatableModel):
         name = models.CharField(_("Название"), max_length=255, null=True, blank=True),
         description = models.TextField(_("Описание"), null=True, blank=True),
     )
-    image = models.ImageField(upload_to='services/', verbose_name='Изображение', null=True, blank=True)
+    image = models.ImageField(upload_to='services/', storage=get_blob_storage, validators=[validate_image_pixels], verbose_name='Изображение', null=True, blank=True)
+    variants = models.JSONField(_("Варианты изображения"), default=dict, blank=True, editable=False)
+    placeholder = models.TextField(_("Заглушка изображения"), blank=True, default='', editable=False)
     category = models.ForeignKey(ServiceCategory, on_delete=models.CASCADE, verbose_name='Категория', null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания', null=True, blank=True)
     
@@ -274,7 +348,9 @@ class TeamMember(TranslatableModel):
         position = models.CharField(_("Должность"), max_length=255, null=True, blank=True),
         description = models.TextField(_("Описание"), null=True, blank=True),
     )
-    image = models.ImageField(upload_to='team/', verbose_name='Изображение', null=True, blank=True)
+    image = models.ImageField(upload_to='team/', storage=get_blob_storage, validators=[validate_image_pixels], verbose_name='Изображение', null=True, blank=True)
+    variants = models.JSONField(_("Варианты изображения"), default=dict, blank=True, editable=False)
+    placeholder = models.TextField(_("Заглушка изображения"), blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания', null=True, blank=True)
     
     def __str__(self):
@@ -346,6 +422,7 @@ class Gallery(TranslatableModel):
         description = models.TextField(_("Описание"), null=True, blank=True),
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания', null=True, blank=True)
+    deleted_at = models.DateTimeField(_("Дата удаления"), null=True, blank=True, editable=False, db_index=True)
     
     def __str__(self):
         names = []
@@ -372,7 +449,14 @@ class Gallery(TranslatableModel):
 
 class GalleryImage(models.Model):
     gallery = models.ForeignKey(Gallery, on_delete=models.CASCADE, related_name='images', verbose_name='Галерея', null=True, blank=True)
-    image = models.ImageField(upload_to='gallery/', verbose_name='Изображение', null=True, blank=True)
+    image = models.ImageField(upload_to='gallery/', storage=get_blob_storage, validators=[validate_image_pixels], verbose_name='Изображение', null=True, blank=True)
+    variants = models.JSONField(_("Варианты изображения"), default=dict, blank=True, editable=False)
+    placeholder = models.TextField(_("Заглушка изображения"), blank=True, default='', editable=False)
+    width = models.PositiveIntegerField(_("Ширина"), null=True, blank=True, editable=False, db_index=True)
+    height = models.PositiveIntegerField(_("Высота"), null=True, blank=True, editable=False, db_index=True)
+    size = models.PositiveBigIntegerField(_("Размер файла (байт)"), null=True, blank=True, editable=False, db_index=True)
+    mime_type = models.CharField(_("MIME-тип"), max_length=50, blank=True, default='', editable=False, db_index=True)
+    color = models.CharField(_("Средний цвет"), max_length=7, blank=True, default='', editable=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания', null=True, blank=True)
     
     objects = models.Manager()
@@ -396,6 +480,7 @@ class ContactForm(models.Model):
     phone = models.CharField(_("Телефон"), max_length=20, null=True, blank=True)
     email = models.EmailField(_("Email"), null=True, blank=True)
     message = models.TextField(_("Сообщение"), null=True, blank=True)
+    submission_id = models.UUIDField(_("ID заявки"), default=uuid.uuid4, unique=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания', null=True, blank=True)
     
     def __str__(self):
@@ -406,6 +491,82 @@ class ContactForm(models.Model):
         verbose_name_plural = '10. Формы обратной связи'
 
 
+class ContentVersion(models.Model):
+    key = models.CharField(_("Ключ"), max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(_("Версия"), default=0)
+    updated_at = models.DateTimeField(_("Дата изменения"), auto_now=True)
+    
+    def __str__(self):
+        return f'{self.key} v{self.version}'
+    
+    class Meta:
+        verbose_name = 'Версия контента'
+        verbose_name_plural = 'Версии контента'
+
+
+class MediaBlob(models.Model):
+    name = models.CharField(_("Путь"), max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(_("Размер (байт)"), default=0)
+    ref_count = models.PositiveIntegerField(_("Количество ссылок"), default=0)
+    created_at = models.DateTimeField(_("Дата создания"), auto_now_add=True)
+    
+    def __str__(self):
+        return f'{self.name} ({self.ref_count})'
+    
+    class Meta:
+        verbose_name = 'Файл медиа'
+        verbose_name_plural = 'Файлы медиа'
+
+
+class UploadSession(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Загружается'
+        COMPLETE = 'complete', 'Загружен'
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name='Пользователь', null=True, blank=True)
+    filename = models.CharField(_("Имя файла"), max_length=255)
+    size = models.PositiveBigIntegerField(_("Размер (байт)"))
+    sha256 = models.CharField(_("SHA-256"), max_length=64, blank=True, default='')
+    fingerprint = models.CharField(_("Отпечаток файла"), max_length=160, blank=True, default='')
+    received = models.PositiveBigIntegerField(_("Получено (байт)"), default=0)
+    status = models.CharField(_("Статус"), max_length=20, choices=Status.choices, default=Status.PENDING)
+    lease_until = models.DateTimeField(_("Запись чанка до"), null=True, blank=True)
+    created_at = models.DateTimeField(_("Дата создания"), auto_now_add=True)
+    updated_at = models.DateTimeField(_("Дата изменения"), auto_now=True)
+    
+    def __str__(self):
+        return f'{self.filename} ({self.received}/{self.size})'
+    
+    class Meta:
+        verbose_name = 'Загрузка файла'
+        verbose_name_plural = 'Загрузки файлов'
+
+
+class DataExport(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        DONE = 'done', 'Готово'
+        FAILED = 'failed', 'Ошибка'
+    
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, verbose_name='Пользователь', null=True, blank=True)
+    model = models.CharField(_("Модель"), max_length=100)
+    file = models.FileField(_("Файл"), storage=get_export_storage, blank=True)
+    rows = models.PositiveIntegerField(_("Строк"), null=True, blank=True)
+    status = models.CharField(_("Статус"), max_length=20, choices=Status.choices, default=Status.PENDING)
+    error = models.TextField(_("Ошибка"), blank=True, default='')
+    created_at = models.DateTimeField(_("Дата создания"), auto_now_add=True)
+    finished_at = models.DateTimeField(_("Дата завершения"), null=True, blank=True)
+    
+    def __str__(self):
+        return f'{self.model} ({self.created_at:%Y-%m-%d %H:%M})' if self.created_at else self.model
+    
+    class Meta:
+        verbose_name = 'Экспорт данных'
+        verbose_name_plural = 'Экспорт данных'
+        ordering = ['-created_at']
+
+
 class User(AbstractUser):
     is_manager = models.BooleanField(_("Менеджер"), default=False, help_text='Designates whether this user is a manager.')
     
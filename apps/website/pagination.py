@@ -0,0 +1,105 @@
+import base64
+import json
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class CreatedAtCursorPagination(BasePagination):
+    """
+    Keyset pagination over ``(created_at, id)``.
+    Pages are fetched with ``WHERE (created_at, id) < cursor`` instead of
+    OFFSET and no ``COUNT(*)`` is run, so every page costs the same.
+    The direction follows the ``created_at`` ordering of the queryset.
+    Rows without ``created_at`` come last in both directions, ordered by
+    ``id``; their cursor carries ``null`` instead of a date.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        descending = self.is_descending(queryset)
+        if descending:
+            queryset = queryset.order_by(F('created_at').desc(nulls_last=True), '-id')
+        else:
+            queryset = queryset.order_by(F('created_at').asc(nulls_last=True), 'id')
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            created_at, pk = cursor
+            after = 'lt' if descending else 'gt'
+            if created_at is None:
+                queryset = queryset.filter(created_at__isnull=True, **{f'id__{after}': pk})
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'created_at__{after}': created_at})
+                    | Q(created_at=created_at, **{f'id__{after}': pk})
+                    | Q(created_at__isnull=True)
+                )
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def is_descending(self, queryset):
+        for field in queryset.query.order_by:
+            if isinstance(field, str) and field.lstrip('-') == 'created_at':
+                return field.startswith('-')
+        return True
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            created_at = None if data['c'] is None else parse_datetime(data['c'])
+            pk = int(data['i'])
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None and data['c'] is not None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
+
+    def encode_cursor(self, instance):
+        created_at = instance.created_at.isoformat() if instance.created_at is not None else None
+        data = json.dumps({'c': created_at, 'i': instance.pk})
+        return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Cursor value from the previous page',
+            'schema': {'type': 'string'},
+        }]
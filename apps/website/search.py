@@ -0,0 +1,209 @@
+import re
+import threading
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from .models import Project, ProjectSearchEntry, Service, SearchKey, SearchTrigram
+from .transliteration import normalize_key, trigrams
+
+
+SEARCH_FIELDS = ['name', 'brand', 'country', 'description', 'short_description']
+
+# bm25 column weights for FTS5, in SEARCH_FIELDS order
+FTS5_WEIGHTS = [10.0, 8.0, 3.0, 1.0, 2.0]
+
+MAX_RESULTS = 1000
+
+_pending = threading.local()
+
+
+def normalize(value):
+    return (value or '').casefold()
+
+
+def get_terms(query):
+    return re.findall(r'\w+', normalize(query))
+
+
+def index_search_keys(kind, translations):
+    """Replaces the fuzzy search keys (normalized names and trigrams) of ``kind``."""
+    keys = []
+    key_trigrams = []
+    for translation in translations:
+        key = normalize_key(translation.name)[:255]
+        if key:
+            keys.append(SearchKey(
+                kind=kind,
+                object_id=translation.master_id,
+                language_code=translation.language_code,
+                key=key,
+                trigram_count=len(trigrams(key))
+            ))
+    SearchKey.objects.bulk_create(keys)
+    for search_key in keys:
+        key_trigrams.extend(
+            SearchTrigram(search_key=search_key, kind=kind, trigram=trigram)
+            for trigram in trigrams(search_key.key)
+        )
+    SearchTrigram.objects.bulk_create(key_trigrams, batch_size=1000)
+
+
+def index_projects(project_ids):
+    """Replaces the search entries and keys of ``project_ids`` with their current translations."""
+    project_ids = [pk for pk in project_ids if pk]
+    ProjectTranslation = Project._parler_meta.root_model
+    translations = list(ProjectTranslation.objects.filter(master_id__in=project_ids))
+    entries = [
+        ProjectSearchEntry(
+            project_id=translation.master_id,
+            language_code=translation.language_code,
+            **{field: normalize(getattr(translation, field)) for field in SEARCH_FIELDS}
+        )
+        for translation in translations
+    ]
+    with transaction.atomic():
+        ProjectSearchEntry.objects.filter(project_id__in=project_ids).delete()
+        ProjectSearchEntry.objects.bulk_create(entries)
+        SearchKey.objects.filter(kind=SearchKey.Kind.PROJECT, object_id__in=project_ids).delete()
+        index_search_keys(SearchKey.Kind.PROJECT, translations)
+
+
+def index_services(service_ids):
+    """Replaces the search keys of ``service_ids`` with their current translations."""
+    service_ids = [pk for pk in service_ids if pk]
+    ServiceTranslation = Service._parler_meta.root_model
+    with transaction.atomic():
+        SearchKey.objects.filter(kind=SearchKey.Kind.SERVICE, object_id__in=service_ids).delete()
+        index_search_keys(SearchKey.Kind.SERVICE, ServiceTranslation.objects.filter(master_id__in=service_ids))
+
+
+INDEXERS = {
+    SearchKey.Kind.PROJECT: index_projects,
+    SearchKey.Kind.SERVICE: index_services,
+}
+
+
+def schedule_indexing(kind, object_ids):
+    """Re-indexes ``object_ids`` of ``kind`` after the current transaction commits."""
+    if not hasattr(_pending, 'ids'):
+        _pending.ids = {}
+    _pending.ids.setdefault(kind, set()).update(pk for pk in object_ids if pk)
+    transaction.on_commit(_flush_pending)
+
+
+def _flush_pending():
+    pending = {kind: ids.copy() for kind, ids in _pending.ids.items()}
+    _pending.ids.clear()
+    for kind, object_ids in pending.items():
+        if object_ids:
+            INDEXERS[kind](object_ids)
+
+
+def fuzzy_search(kind, query):
+    """
+    Ids of ``kind`` objects whose name shares enough trigrams with ``query``
+    after script transliteration and case/apostrophe folding, best first.
+    The score is the share of the query trigrams found in the name
+    (like pg_trgm ``word_similarity``), ties broken by full similarity.
+    Only the ``(kind, trigram)`` index is scanned.
+    """
+    query_trigrams = trigrams(normalize_key(query))
+    if not query_trigrams:
+        return []
+    rows = (
+        SearchTrigram.objects
+        .filter(kind=kind, trigram__in=query_trigrams)
+        .values('search_key', 'search_key__object_id', 'search_key__trigram_count')
+        .annotate(shared=Count('id'))
+        .order_by()
+    )
+    scores = {}
+    for row in rows:
+        shared = row['shared']
+        score = (
+            shared / len(query_trigrams),
+            shared / (len(query_trigrams) + row['search_key__trigram_count'] - shared)
+        )
+        object_id = row['search_key__object_id']
+        if score > scores.get(object_id, (0, 0)):
+            scores[object_id] = score
+    ranked = sorted(scores.items(), key=lambda item: (item[1], item[0]), reverse=True)
+    threshold = settings.FUZZY_SEARCH_THRESHOLD
+    return [object_id for object_id, score in ranked if score[0] >= threshold][:MAX_RESULTS]
+
+
+def rank_projects(query):
+    """Project ids for ``?search=``: full-text matches first, then fuzzy name matches."""
+    project_ids = search_projects(query)
+    found = set(project_ids)
+    return project_ids + [pk for pk in fuzzy_search(SearchKey.Kind.PROJECT, query) if pk not in found]
+
+
+def search_projects(query, fields=None):
+    """
+    Returns the ids of the projects matching every word of ``query`` as a
+    prefix, best match first. ``fields`` restricts the searched columns.
+    Uses FTS5 on SQLite and the ``search_vector`` GIN index on PostgreSQL.
+    """
+    terms = get_terms(query)
+    if not terms:
+        return []
+    fields = fields or SEARCH_FIELDS
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(terms, fields)
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(terms, fields)
+    return _search_fallback(terms, fields)
+
+
+def _search_sqlite(terms, fields):
+    match = ' AND '.join(f'"{term}"*' for term in terms)
+    if fields != SEARCH_FIELDS:
+        match = '{%s} : (%s)' % (' '.join(fields), match)
+    weights = ', '.join(str(weight) for weight in FTS5_WEIGHTS)
+    sql = f"""
+        SELECT e.project_id
+        FROM website_projectsearchentry_fts
+        JOIN website_projectsearchentry e ON e.id = website_projectsearchentry_fts.rowid
+        WHERE website_projectsearchentry_fts MATCH %s
+        ORDER BY bm25(website_projectsearchentry_fts, {weights}), e.project_id DESC
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match])
+        # One row per matching language; keep each project at its best rank
+        project_ids = dict.fromkeys(row[0] for row in cursor.fetchall())
+    return list(project_ids)[:MAX_RESULTS]
+
+
+def _search_postgresql(terms, fields):
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    if fields == SEARCH_FIELDS:
+        vector = 'search_vector'
+    else:
+        vector = ' || '.join(f"to_tsvector('simple', coalesce({field}, ''))" for field in fields)
+    sql = f"""
+        SELECT project_id, MAX(ts_rank({vector}, query)) AS rank
+        FROM website_projectsearchentry, to_tsquery('simple', %s) query
+        WHERE {vector} @@ query
+        GROUP BY project_id
+        ORDER BY rank DESC, project_id DESC
+        LIMIT {MAX_RESULTS}
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [tsquery])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_fallback(terms, fields):
+    condition = Q()
+    for term in terms:
+        term_condition = Q()
+        for field in fields:
+            term_condition |= Q(**{f'{field}__contains': term})
+        condition &= term_condition
+    return list(
+        ProjectSearchEntry.objects.filter(condition)
+        .order_by('-project_id')
+        .values_list('project_id', flat=True)
+        .distinct()[:MAX_RESULTS]
+    )
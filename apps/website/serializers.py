@@ -1,9 +1,12 @@
 from rest_framework import serializers
+from django.core.files.storage import default_storage
 from .models import (
     Category, Project, ProjectImage, ProjectVideo, ProjectSEO,
     ServiceCategory, Service, ServiceItem, ServiceDetail,
     TeamMember, CEO, Gallery, GalleryImage, ContactForm
 )
+from .imaging import build_srcset
+from .translations import build_translations, select_languages
 
 
 class TranslationSerializer(serializers.Serializer):
@@ -11,21 +14,52 @@ class TranslationSerializer(serializers.Serializer):
     uz = serializers.DictField(required=False)
 
 
-class CategorySerializer(serializers.ModelSerializer):
-    translations = serializers.SerializerMethodField()
+class TranslatedFieldsMixin:
+    """
+    Serializes ``translations`` from the prefetched translation rows,
+    limited to ``context['languages']`` when the request selects a language.
+    Subclasses list the translated fields in ``translated_fields``.
+    """
+    translated_fields = []
     
     def get_translations(self, obj):
-        result = {}
-        for lang_code in ['ru', 'uz']:
-            try:
-                if obj.has_translation(lang_code):
-                    obj.set_current_language(lang_code)
-                    result[lang_code] = {
-                        'name': obj.name
-                    }
-            except Exception:
-                pass
-        return result
+        return build_translations(obj, self.translated_fields, self.context.get('languages'))
+
+
+class SparseFieldsMixin:
+    """
+    Accepts ``fields`` (top-level fields to keep) and ``expand`` (relations
+    to embed) keyword arguments, passed by the viewsets from ``?fields=`` /
+    ``?expand=``. With ``expand`` given, the relations of
+    ``expandable_fields`` that are not listed are rendered as their id
+    (when mapped to an id attribute) or left out. ``None`` keeps everything.
+    """
+    expandable_fields = {}
+    
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requested_fields = fields
+        self.requested_expand = expand
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.requested_fields is not None:
+            fields = {name: field for name, field in fields.items() if name in self.requested_fields}
+        if self.requested_expand is not None:
+            for name, id_attribute in self.expandable_fields.items():
+                if name not in fields or name in self.requested_expand:
+                    continue
+                if id_attribute:
+                    fields[name] = serializers.IntegerField(source=id_attribute, read_only=True)
+                else:
+                    del fields[name]
+        return fields
+
+
+class CategorySerializer(SparseFieldsMixin, TranslatedFieldsMixin, serializers.ModelSerializer):
+    translations = serializers.SerializerMethodField()
+    
+    translated_fields = ['name']
     
     class Meta:
         model = Category
@@ -34,6 +68,7 @@ class CategorySerializer(serializers.ModelSerializer):
 
 class ProjectImageSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
     
     def get_image(self, obj):
         if obj.image:
@@ -43,13 +78,17 @@ class ProjectImageSerializer(serializers.ModelSerializer):
             return obj.image.url
         return None
     
+    def get_srcset(self, obj):
+        return build_srcset(obj.variants, self.context.get('request'))
+    
     class Meta:
         model = ProjectImage
-        fields = ['id', 'image', 'created_at']
+        fields = ['id', 'image', 'srcset', 'placeholder', 'width', 'height', 'size', 'mime_type', 'color', 'created_at']
 
 
 class ProjectVideoSerializer(serializers.ModelSerializer):
     video = serializers.SerializerMethodField()
+    poster = serializers.SerializerMethodField()
     
     def get_video(self, obj):
         if obj.video:
@@ -59,57 +98,37 @@ class ProjectVideoSerializer(serializers.ModelSerializer):
             return obj.video.url
         return None
     
+    def get_poster(self, obj):
+        if obj.poster:
+            url = default_storage.url(obj.poster)
+            request = self.context.get('request')
+            return request.build_absolute_uri(url) if request else url
+        return None
+    
     class Meta:
         model = ProjectVideo
-        fields = ['id', 'video', 'created_at']
+        fields = ['id', 'video', 'poster', 'duration', 'codec', 'width', 'height', 'bitrate', 'created_at']
 
 
-class ProjectSEOSerializer(serializers.ModelSerializer):
+class ProjectSEOSerializer(TranslatedFieldsMixin, serializers.ModelSerializer):
     translations = serializers.SerializerMethodField()
     
-    def get_translations(self, obj):
-        result = {}
-        for lang_code in ['ru', 'uz']:
-            try:
-                if obj.has_translation(lang_code):
-                    obj.set_current_language(lang_code)
-                    result[lang_code] = {
-                        'title': obj.title,
-                        'description': obj.description,
-                        'keywords': obj.keywords
-                    }
-            except Exception:
-                pass
-        return result
+    translated_fields = ['title', 'description', 'keywords']
     
     class Meta:
         model = ProjectSEO
         fields = ['id', 'translations', 'created_at']
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsMixin, TranslatedFieldsMixin, serializers.ModelSerializer):
     translations = serializers.SerializerMethodField()
     category = CategorySerializer(read_only=True)
     images = serializers.SerializerMethodField()
     videos = serializers.SerializerMethodField()
     seo = serializers.SerializerMethodField()
     
-    def get_translations(self, obj):
-        result = {}
-        for lang_code in ['ru', 'uz']:
-            try:
-                if obj.has_translation(lang_code):
-                    obj.set_current_language(lang_code)
-                    result[lang_code] = {
-                        'name': obj.name,
-                        'description': obj.description,
-                        'short_description': obj.short_description,
-                        'brand': obj.brand,
-                        'country': obj.country
-                    }
-            except Exception:
-                pass
-        return result
+    translated_fields = ['name', 'description', 'short_description', 'brand', 'country']
+    expandable_fields = {'category': 'category_id', 'images': None, 'videos': None, 'seo': None}
     
     def get_images(self, obj):
         images = obj.images.all()
@@ -131,99 +150,54 @@ class ProjectSerializer(serializers.ModelSerializer):
         ]
 
 
-class ServiceCategorySerializer(serializers.ModelSerializer):
+class ServiceCategorySerializer(SparseFieldsMixin, TranslatedFieldsMixin, serializers.ModelSerializer):
     translations = serializers.SerializerMethodField()
     
+    translated_fields = ['name']
+    
     def get_translations(self, obj):
-        result = {}
-        current_lang = obj.get_current_language()
-        for lang_code in ['ru', 'uz']:
-            try:
-                if obj.has_translation(lang_code):
-                    obj.set_current_language(lang_code)
-                    name = getattr(obj, 'name', None)
-                    if name and str(name).strip():
-                        result[lang_code] = {
-                            'name': name
-                        }
-            except Exception:
-                pass
-            finally:
-                # Original language ni qaytarish
-                if current_lang:
-                    try:
-                        obj.set_current_language(current_lang)
-                    except Exception:
-                        pass
-        return result
+        translations = {
+            lang_code: values
+            for lang_code, values in build_translations(obj, self.translated_fields).items()
+            if values['name'] and str(values['name']).strip()
+        }
+        return select_languages(translations, self.context.get('languages'))
     
     class Meta:
         model = ServiceCategory
         fields = ['id', 'translations', 'created_at']
 
 
-class ServiceDetailSerializer(serializers.ModelSerializer):
+class ServiceDetailSerializer(TranslatedFieldsMixin, serializers.ModelSerializer):
     translations = serializers.SerializerMethodField()
     
-    def get_translations(self, obj):
-        result = {}
-        for lang_code in ['ru', 'uz']:
-            try:
-                if obj.has_translation(lang_code):
-                    obj.set_current_language(lang_code)
-                    result[lang_code] = {
-                        'name': obj.name
-                    }
-            except Exception:
-                pass
-        return result
+    translated_fields = ['name']
     
     class Meta:
         model = ServiceDetail
         fields = ['id', 'translations', 'created_at']
 
 
-class ServiceItemSerializer(serializers.ModelSerializer):
+class ServiceItemSerializer(TranslatedFieldsMixin, serializers.ModelSerializer):
     translations = serializers.SerializerMethodField()
     service_details = ServiceDetailSerializer(many=True, read_only=True)
     
-    def get_translations(self, obj):
-        result = {}
-        for lang_code in ['ru', 'uz']:
-            try:
-                if obj.has_translation(lang_code):
-                    obj.set_current_language(lang_code)
-                    result[lang_code] = {
-                        'name': obj.name
-                    }
-            except Exception:
-                pass
-        return result
+    translated_fields = ['name']
     
     class Meta:
         model = ServiceItem
         fields = ['id', 'translations', 'service_details', 'created_at']
 
 
-class ServiceSerializer(serializers.ModelSerializer):
+class ServiceSerializer(SparseFieldsMixin, TranslatedFieldsMixin, serializers.ModelSerializer):
     translations = serializers.SerializerMethodField()
     category = ServiceCategorySerializer(read_only=True)
     service_items = ServiceItemSerializer(many=True, read_only=True)
     image = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
     
-    def get_translations(self, obj):
-        result = {}
-        for lang_code in ['ru', 'uz']:
-            try:
-                if obj.has_translation(lang_code):
-                    obj.set_current_language(lang_code)
-                    result[lang_code] = {
-                        'name': obj.name,
-                        'description': obj.description
-                    }
-            except Exception:
-                pass
-        return result
+    translated_fields = ['name', 'description']
+    expandable_fields = {'category': 'category_id', 'service_items': None}
     
     def get_image(self, obj):
         if obj.image:
@@ -233,29 +207,20 @@ class ServiceSerializer(serializers.ModelSerializer):
             return obj.image.url
         return None
     
+    def get_srcset(self, obj):
+        return build_srcset(obj.variants, self.context.get('request'))
+    
     class Meta:
         model = Service
-        fields = ['id', 'translations', 'image', 'category', 'service_items', 'created_at']
+        fields = ['id', 'translations', 'image', 'srcset', 'placeholder', 'category', 'service_items', 'created_at']
 
 
-class TeamMemberSerializer(serializers.ModelSerializer):
+class TeamMemberSerializer(SparseFieldsMixin, TranslatedFieldsMixin, serializers.ModelSerializer):
     translations = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
     
-    def get_translations(self, obj):
-        result = {}
-        for lang_code in ['ru', 'uz']:
-            try:
-                if obj.has_translation(lang_code):
-                    obj.set_current_language(lang_code)
-                    result[lang_code] = {
-                        'name': obj.name,
-                        'position': obj.position,
-                        'description': obj.description
-                    }
-            except Exception:
-                pass
-        return result
+    translated_fields = ['name', 'position', 'description']
     
     def get_image(self, obj):
         if obj.image:
@@ -265,27 +230,18 @@ class TeamMemberSerializer(serializers.ModelSerializer):
             return obj.image.url
         return None
     
+    def get_srcset(self, obj):
+        return build_srcset(obj.variants, self.context.get('request'))
+    
     class Meta:
         model = TeamMember
-        fields = ['id', 'translations', 'image', 'created_at']
+        fields = ['id', 'translations', 'image', 'srcset', 'placeholder', 'created_at']
 
 
-class CEOSerializer(serializers.ModelSerializer):
+class CEOSerializer(SparseFieldsMixin, TranslatedFieldsMixin, serializers.ModelSerializer):
     translations = serializers.SerializerMethodField()
     
-    def get_translations(self, obj):
-        result = {}
-        for lang_code in ['ru', 'uz']:
-            try:
-                if obj.has_translation(lang_code):
-                    obj.set_current_language(lang_code)
-                    result[lang_code] = {
-                        'name': obj.name,
-                        'description': obj.description
-                    }
-            except Exception:
-                pass
-        return result
+    translated_fields = ['name', 'description']
     
     class Meta:
         model = CEO
@@ -294,6 +250,7 @@ class CEOSerializer(serializers.ModelSerializer):
 
 class GalleryImageSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
     
     def get_image(self, obj):
         if obj.image:
@@ -303,28 +260,20 @@ class GalleryImageSerializer(serializers.ModelSerializer):
             return obj.image.url
         return None
     
+    def get_srcset(self, obj):
+        return build_srcset(obj.variants, self.context.get('request'))
+    
     class Meta:
         model = GalleryImage
-        fields = ['id', 'image', 'created_at']
+        fields = ['id', 'image', 'srcset', 'placeholder', 'width', 'height', 'size', 'mime_type', 'color', 'created_at']
 
 
-class GallerySerializer(serializers.ModelSerializer):
+class GallerySerializer(SparseFieldsMixin, TranslatedFieldsMixin, serializers.ModelSerializer):
     translations = serializers.SerializerMethodField()
     images = serializers.SerializerMethodField()
     
-    def get_translations(self, obj):
-        result = {}
-        for lang_code in ['ru', 'uz']:
-            try:
-                if obj.has_translation(lang_code):
-                    obj.set_current_language(lang_code)
-                    result[lang_code] = {
-                        'name': obj.name,
-                        'description': obj.description
-                    }
-            except Exception:
-                pass
-        return result
+    translated_fields = ['name', 'description']
+    expandable_fields = {'images': None}
     
     def get_images(self, obj):
         images = obj.images.all()
@@ -338,6 +287,6 @@ class GallerySerializer(serializers.ModelSerializer):
 class ContactFormSerializer(serializers.ModelSerializer):
     class Meta:
         model = ContactForm
-        fields = ['id', 'name', 'phone', 'email', 'message', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = ['id', 'submission_id', 'name', 'phone', 'email', 'message', 'created_at']
+        read_only_fields = ['id', 'submission_id', 'created_at']
 
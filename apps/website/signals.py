@@ -0,0 +1,168 @@
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .autocomplete import autocomplete_index
+from .blobs import BLOB_FIELDS, acquire_blob, release_blob
+from .deletion import is_purging
+from .imaging import (
+    METADATA_MODELS, VARIANT_MODELS, apply_image_metadata, delete_variants, needs_variants, normalize_upload,
+    refresh_variants
+)
+from .models import Category, ContactForm, Project, ProjectImage, ProjectVideo, ProjectSEO, Service, SearchKey
+from .search import schedule_indexing
+from .snapshots import schedule_snapshot_rebuild
+from .tasks import notify_contact_form
+from .versioning import VERSIONED_MODELS, bump_version
+from .video import delete_poster, needs_probe, refresh_video_probe
+
+
+ProjectTranslation = Project._parler_meta.root_model
+CategoryTranslation = Category._parler_meta.root_model
+ProjectSEOTranslation = ProjectSEO._parler_meta.root_model
+ServiceTranslation = Service._parler_meta.root_model
+
+
+# Project snapshots
+
+@receiver(post_save, sender=Project)
+def project_changed(sender, instance, **kwargs):
+    schedule_snapshot_rebuild([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=ProjectTranslation)
+def project_translation_changed(sender, instance, **kwargs):
+    schedule_snapshot_rebuild([instance.master_id])
+
+
+@receiver([post_save, post_delete], sender=ProjectImage)
+@receiver([post_save, post_delete], sender=ProjectVideo)
+@receiver([post_save, post_delete], sender=ProjectSEO)
+def project_relation_changed(sender, instance, **kwargs):
+    if not is_purging():
+        schedule_snapshot_rebuild([instance.project_id])
+
+
+@receiver([post_save, post_delete], sender=ProjectSEOTranslation)
+def project_seo_translation_changed(sender, instance, **kwargs):
+    project_id = ProjectSEO.objects.filter(pk=instance.master_id).values_list('project_id', flat=True).first()
+    schedule_snapshot_rebuild([project_id])
+
+
+@receiver(post_save, sender=Category)
+@receiver([post_save, post_delete], sender=CategoryTranslation)
+def category_changed(sender, instance, **kwargs):
+    category_id = instance.master_id if sender is CategoryTranslation else instance.pk
+    schedule_snapshot_rebuild(Project.objects.filter(category_id=category_id).values_list('pk', flat=True))
+
+
+# Search indexes
+
+@receiver([post_save, post_delete], sender=ProjectTranslation)
+def project_translation_indexed(sender, instance, **kwargs):
+    schedule_indexing(SearchKey.Kind.PROJECT, [instance.master_id])
+    transaction.on_commit(lambda: autocomplete_index.update_projects([instance.master_id]))
+
+
+@receiver([post_save, post_delete], sender=ServiceTranslation)
+def service_translation_indexed(sender, instance, **kwargs):
+    schedule_indexing(SearchKey.Kind.SERVICE, [instance.master_id])
+
+
+# Image normalization, metadata and variants
+
+def image_saving(sender, instance, **kwargs):
+    normalize_upload(instance)
+    if sender._meta.label in METADATA_MODELS:
+        apply_image_metadata(instance)
+
+
+for label in VARIANT_MODELS:
+    sender = apps.get_model(label)
+    pre_save.connect(image_saving, sender=sender, dispatch_uid=f'image_upload_{sender._meta.label_lower}')
+
+
+def image_saved(sender, instance, **kwargs):
+    if needs_variants(instance):
+        refresh_variants.delay(sender._meta.label, instance.pk)
+
+
+def image_deleted(sender, instance, **kwargs):
+    if instance.variants:
+        delete_variants.delay(instance.variants)
+
+
+for label in VARIANT_MODELS:
+    sender = apps.get_model(label)
+    post_save.connect(image_saved, sender=sender, dispatch_uid=f'image_variants_save_{sender._meta.label_lower}')
+    post_delete.connect(image_deleted, sender=sender, dispatch_uid=f'image_variants_delete_{sender._meta.label_lower}')
+
+
+# Video metadata and posters
+
+@receiver(post_save, sender=ProjectVideo)
+def video_saved(sender, instance, **kwargs):
+    if needs_probe(instance):
+        refresh_video_probe.delay(instance.pk)
+
+
+@receiver(post_delete, sender=ProjectVideo)
+def video_deleted(sender, instance, **kwargs):
+    if instance.poster:
+        delete_poster.delay(instance.poster)
+
+
+# Contact form notifications
+
+@receiver(post_save, sender=ContactForm)
+def contact_form_saved(sender, instance, created, **kwargs):
+    if created and settings.CONTACT_FORM_NOTIFY_EMAILS:
+        notify_contact_form.apply_async([instance.pk], idempotency_key=instance.pk)
+
+
+# Content-addressed media reference counts
+
+def blob_field_saving(sender, instance, update_fields=None, **kwargs):
+    field = BLOB_FIELDS[sender._meta.label]
+    if update_fields is not None and field not in update_fields:
+        instance._previous_blob = None
+    elif instance.pk:
+        instance._previous_blob = sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first() or ''
+    else:
+        instance._previous_blob = ''
+
+
+def blob_field_saved(sender, instance, **kwargs):
+    previous = instance.__dict__.pop('_previous_blob', None)
+    current = getattr(instance, BLOB_FIELDS[sender._meta.label]).name or ''
+    if previous is not None and current != previous:
+        acquire_blob(current)
+        release_blob(previous)
+
+
+def blob_field_deleted(sender, instance, **kwargs):
+    release_blob(getattr(instance, BLOB_FIELDS[sender._meta.label]).name)
+
+
+for label in BLOB_FIELDS:
+    sender = apps.get_model(label)
+    pre_save.connect(blob_field_saving, sender=sender, dispatch_uid=f'media_blob_pre_save_{sender._meta.label_lower}')
+    post_save.connect(blob_field_saved, sender=sender, dispatch_uid=f'media_blob_save_{sender._meta.label_lower}')
+    post_delete.connect(blob_field_deleted, sender=sender, dispatch_uid=f'media_blob_delete_{sender._meta.label_lower}')
+
+
+# Content versions (ETag / response cache invalidation)
+
+def content_changed(sender, **kwargs):
+    if not is_purging():
+        bump_version(sender)
+
+
+for model in VERSIONED_MODELS:
+    senders = [model]
+    if hasattr(model, '_parler_meta'):
+        senders.append(model._parler_meta.root_model)
+    for sender in senders:
+        post_save.connect(content_changed, sender=sender, dispatch_uid=f'content_version_save_{sender._meta.label_lower}')
+        post_delete.connect(content_changed, sender=sender, dispatch_uid=f'content_version_delete_{sender._meta.label_lower}')
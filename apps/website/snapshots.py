@@ -0,0 +1,141 @@
+import threading
+from django.db import transaction
+from rest_framework import serializers
+from .models import Project
+from .imaging import absolutize_srcset
+from .serializers import ProjectSerializer
+from .translations import select_languages
+
+
+_pending = threading.local()
+
+
+def get_snapshot_queryset():
+    return Project.objects.select_related('category').prefetch_related(
+        'translations',
+        'category__translations',
+        'images',
+        'videos',
+        'seo__translations'
+    )
+
+
+def build_snapshot(project):
+    """Full ``ProjectSerializer`` output with all languages and relative media URLs."""
+    return ProjectSerializer(project).data
+
+
+def rebuild_snapshots(project_ids):
+    """Regenerates and stores the snapshots of ``project_ids``, returns ``{id: snapshot}``."""
+    projects = list(get_snapshot_queryset().filter(pk__in=list(project_ids)))
+    for project in projects:
+        project.snapshot = build_snapshot(project)
+    Project.objects.bulk_update(projects, ['snapshot'])
+    return {project.pk: project.snapshot for project in projects}
+
+
+def schedule_snapshot_rebuild(project_ids):
+    """
+    Rebuilds the snapshots after the current transaction commits. Ids scheduled
+    by several saves in one transaction (admin inlines) are rebuilt together.
+    """
+    if not hasattr(_pending, 'ids'):
+        _pending.ids = set()
+    _pending.ids.update(pk for pk in project_ids if pk)
+    transaction.on_commit(_flush_pending)
+
+
+def _flush_pending():
+    project_ids = _pending.ids.copy()
+    _pending.ids.clear()
+    if project_ids:
+        rebuild_snapshots(project_ids)
+
+
+def _absolute_url(url, request):
+    if url and request:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def render_snapshot(snapshot, request=None, languages=None, fields=None, expand=None):
+    """
+    Adapts a stored snapshot to the request: absolute media URLs, selected
+    languages and the ``fields`` / ``expand`` selection of ``SparseFieldsMixin``.
+    """
+    data = {name: value for name, value in snapshot.items() if fields is None or name in fields}
+    if expand is not None:
+        for name, id_attribute in ProjectSerializer.expandable_fields.items():
+            if name not in data or name in expand:
+                continue
+            if id_attribute:
+                data[name] = data[name]['id'] if data[name] else None
+            else:
+                del data[name]
+    if 'translations' in data:
+        data['translations'] = select_languages(snapshot['translations'], languages)
+    if isinstance(data.get('category'), dict):
+        data['category'] = dict(
+            snapshot['category'],
+            translations=select_languages(snapshot['category']['translations'], languages)
+        )
+    if 'images' in data:
+        data['images'] = [
+            dict(
+                image,
+                image=_absolute_url(image['image'], request),
+                srcset=absolutize_srcset(image.get('srcset'), request)
+            )
+            for image in snapshot['images']
+        ]
+    if 'videos' in data:
+        data['videos'] = [
+            dict(video, video=_absolute_url(video['video'], request), poster=_absolute_url(video.get('poster'), request))
+            for video in snapshot['videos']
+        ]
+    if 'seo' in data:
+        data['seo'] = [
+            dict(seo, translations=select_languages(seo['translations'], languages))
+            for seo in snapshot['seo']
+        ]
+    return data
+
+
+class ProjectSnapshotListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        projects = list(data)
+        missing = [project.pk for project in projects if project.snapshot is None]
+        if missing:
+            snapshots = rebuild_snapshots(missing)
+            for project in projects:
+                if project.snapshot is None:
+                    project.snapshot = snapshots[project.pk]
+        return [self.child.to_representation(project) for project in projects]
+
+
+class ProjectSnapshotSerializer(serializers.BaseSerializer):
+    """
+    Read-only serializer returning the stored snapshot of a project instead
+    of rendering ``ProjectSerializer``; missing snapshots are built on read.
+    Takes the ``fields`` / ``expand`` arguments of ``SparseFieldsMixin``.
+    """
+    expandable_fields = ProjectSerializer.expandable_fields
+    
+    class Meta:
+        list_serializer_class = ProjectSnapshotListSerializer
+    
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requested_fields = fields
+        self.requested_expand = expand
+    
+    def to_representation(self, instance):
+        if instance.snapshot is None:
+            instance.snapshot = rebuild_snapshots([instance.pk])[instance.pk]
+        return render_snapshot(
+            instance.snapshot,
+            self.context.get('request'),
+            self.context.get('languages'),
+            self.requested_fields,
+            self.requested_expand
+        )
@@ -0,0 +1,17 @@
+from django.db import DatabaseError
+
+
+def warm_up():
+    """
+    Builds the per-process in-memory state before the first request and
+    saves the contact forms a stopped process left in the spool.
+    Called from the WSGI/ASGI entry points; a missing or unmigrated
+    database is skipped and the state is then built lazily.
+    """
+    from .autocomplete import autocomplete_index
+    from .ingestion import replay_spool
+    for step in [autocomplete_index.build, replay_spool]:
+        try:
+            step()
+        except DatabaseError:
+            pass
@@ -0,0 +1,73 @@
+import hashlib
+import os
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+
+# Directory of the content-addressed files under MEDIA_ROOT
+BLOB_PREFIX = 'blobs/'
+
+
+def blob_name(digest, extension=''):
+    """``blobs/ab/cd/abcd…<ext>``: two levels of 256 shards keep directories small."""
+    return f'{BLOB_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{extension.lower()[:10]}'
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(BLOB_PREFIX)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every upload once under the SHA-256 of its content, hashed in
+    chunks while streaming (``upload_to`` and the original name only
+    contribute the extension). Saving content that is already stored
+    returns the existing name without writing anything, so names never
+    get suffixes and a URL always means the same bytes.
+
+    Deleting through the storage is left to ``blobs.release_blob``: a
+    file may be shared by several rows.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        if is_blob(name) and self.exists(name):
+            # Raised inside FileSystemStorage._save when a concurrent upload of
+            # the same content won the race; see _save
+            raise FileExistsError(name)
+        return name
+
+    def _save(self, name, content):
+        # Files verified while uploading (resumable uploads) carry their digest
+        digest = getattr(content, 'sha256', None)
+        if not digest:
+            hasher = hashlib.sha256()
+            for chunk in content.chunks():
+                hasher.update(chunk)
+            digest = hasher.hexdigest()
+        name = blob_name(digest, os.path.splitext(name)[1])
+        if self.exists(name):
+            # A fresh mtime keeps the age threshold of the orphaned media
+            # collector away from files that were just referenced again
+            try:
+                os.utime(self.path(name))
+            except OSError:
+                pass
+            return name
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        try:
+            return super()._save(name, content)
+        except FileExistsError:
+            return name
+
+
+blob_storage = ContentAddressedStorage()
+
+
+def get_blob_storage():
+    return blob_storage
+
+
+def get_export_storage():
+    """Storage of background exports: ``EXPORT_ROOT``, outside ``MEDIA_ROOT`` and without a public URL."""
+    return FileSystemStorage(location=settings.EXPORT_ROOT)
@@ -0,0 +1,49 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.mail import send_mail
+from django.utils import timezone
+from import_export.formats import base_formats
+from import_export.resources import modelresource_factory
+from .background import task
+from .models import ContactForm, DataExport
+
+
+@task(queue='exports')
+def export_to_xlsx(export_id, pks):
+    """Writes the rows ``pks`` of the model of a ``DataExport`` to its XLSX file."""
+    export = DataExport.objects.filter(pk=export_id, status=DataExport.Status.PENDING).first()
+    if export is None:
+        return
+    model = apps.get_model(export.model)
+    try:
+        dataset = modelresource_factory(model)().export(queryset=model.objects.filter(pk__in=pks).order_by('pk'))
+        data = base_formats.XLSX().export_data(dataset)
+        export.file.save(
+            f'{model._meta.model_name}-{timezone.now():%Y%m%d-%H%M%S}-{export.pk}.xlsx',
+            ContentFile(data), save=False
+        )
+        export.rows = len(dataset)
+        export.status = DataExport.Status.DONE
+    except Exception as error:
+        export.status = DataExport.Status.FAILED
+        export.error = str(error)
+    export.finished_at = timezone.now()
+    export.save()
+
+
+@task(queue='notifications', max_retries=5, retry_backoff=30)
+def notify_contact_form(pk):
+    """Emails a new contact form submission to ``CONTACT_FORM_NOTIFY_EMAILS``."""
+    form = ContactForm.objects.filter(pk=pk).first()
+    if form is None or not settings.CONTACT_FORM_NOTIFY_EMAILS:
+        return
+    send_mail(
+        f'Новая заявка: {form.name or form.phone or form.email or form.pk}',
+        f'Имя: {form.name or "-"}\n'
+        f'Телефон: {form.phone or "-"}\n'
+        f'Email: {form.email or "-"}\n\n'
+        f'{form.message or ""}',
+        settings.DEFAULT_FROM_EMAIL,
+        settings.CONTACT_FORM_NOTIFY_EMAILS,
+    )
@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.db.models import Prefetch
+from django.utils.translation.trans_real import parse_accept_lang_header
+from parler import appsettings
+
+
+TRANSLATION_LANGUAGES = [code for code, name in settings.LANGUAGES]
+
+
+def get_fallback_languages(lang_code):
+    return appsettings.PARLER_LANGUAGES.get_fallback_languages(lang_code)
+
+
+def get_request_languages(request):
+    """
+    Returns the languages requested by ``?lang=`` (comma separated, ``all``
+    for every language) or, when it is absent, the best Accept-Language
+    match. ``None`` means all languages.
+    """
+    lang = request.GET.get('lang')
+    if lang:
+        if lang.strip().lower() == 'all':
+            return None
+        languages = []
+        for code in lang.split(','):
+            code = code.strip().lower()
+            if code in TRANSLATION_LANGUAGES and code not in languages:
+                languages.append(code)
+        if languages:
+            return languages
+
+    accept = request.META.get('HTTP_ACCEPT_LANGUAGE', '')
+    for accept_lang, unused in parse_accept_lang_header(accept):
+        code = accept_lang.split('-')[0]
+        if code in TRANSLATION_LANGUAGES:
+            return [code]
+    return None
+
+
+def get_loaded_languages(languages):
+    """Requested languages plus their parler fallbacks, in lookup order."""
+    if not languages:
+        return None
+    loaded = []
+    for lang_code in languages:
+        for code in [lang_code] + get_fallback_languages(lang_code):
+            if code not in loaded:
+                loaded.append(code)
+    return loaded
+
+
+def translation_prefetch(model, lookup, languages=None):
+    """
+    Prefetch for a ``...translations`` lookup starting at ``model`` that only
+    loads the rows needed to render ``languages`` (all rows when ``None``).
+    """
+    languages = get_loaded_languages(languages)
+    if not languages:
+        return lookup
+    for part in lookup.split('__')[:-1]:
+        model = model._meta.get_field(part).related_model
+    translations_model = model._parler_meta.root_model
+    return Prefetch(
+        lookup,
+        queryset=translations_model.objects.filter(language_code__in=languages)
+    )
+
+
+def select_languages(translations, languages=None):
+    """
+    Restricts a ``{lang: {...}}`` dict to ``languages``, filling missing
+    languages from their parler fallbacks.
+    """
+    if not languages:
+        return translations
+    result = {}
+    for lang_code in languages:
+        for code in [lang_code] + get_fallback_languages(lang_code):
+            if code in translations:
+                result[lang_code] = translations[code]
+                break
+    return result
+
+
+def build_translations(obj, fields, languages=None):
+    """
+    Builds the ``{ru: {...}, uz: {...}}`` dict of a parler model from its
+    translation rows. Uses ``prefetch_related('translations')`` results when
+    present and never changes the current language of ``obj``.
+    """
+    rows = {}
+    for translation in obj.translations.all():
+        rows[translation.language_code] = {
+            field: getattr(translation, field) for field in fields
+        }
+    translations = {
+        lang_code: rows[lang_code]
+        for lang_code in TRANSLATION_LANGUAGES
+        if lang_code in rows
+    }
+    return select_languages(translations, languages)
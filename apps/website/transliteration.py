@@ -0,0 +1,50 @@
+import re
+
+
+# Uzbek Cyrillic -> Latin (Russian letters included for ru names)
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'ё': 'yo', 'ж': 'j',
+    'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n',
+    'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ф': 'f',
+    'х': 'x', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sh', 'ъ': '', 'ы': 'i',
+    'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya', 'ў': 'o', 'қ': 'q', 'ғ': 'g',
+    'ҳ': 'h',
+}
+
+VOWELS = set('aeiouаеёиоуэюяў')
+
+# o‘ / oʻ / o' / o` / o’ ... ; dropped so "ozbek" matches "o‘zbek"
+APOSTROPHES = re.compile(r"['`´‘’ʻʼʹ]")
+
+
+def transliterate(value):
+    """Uzbek/Russian Cyrillic to Uzbek Latin; ``е`` is ``ye`` word-initially and after vowels."""
+    result = []
+    previous = ''
+    for char in value:
+        if char == 'е':
+            result.append('ye' if not previous.isalpha() or previous in VOWELS else 'e')
+        else:
+            result.append(CYRILLIC_TO_LATIN.get(char, char))
+        previous = char
+    return ''.join(result)
+
+
+def normalize_key(value):
+    """
+    Search key of a name: case-folded, apostrophes removed, transliterated to
+    Latin, punctuation collapsed to single spaces.
+    """
+    value = APOSTROPHES.sub('', (value or '').casefold())
+    value = transliterate(value)
+    return ' '.join(re.findall(r'\w+', value))
+
+
+def trigrams(key):
+    """pg_trgm style trigrams: every word padded with two spaces before and one after."""
+    result = set()
+    for word in key.split():
+        padded = f'  {word} '
+        for index in range(len(padded) - 2):
+            result.add(padded[index:index + 3])
+    return result
@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import re
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_http_methods
+from .models import UploadSession
+
+
+SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+# Bytes read from the request / file at a time
+READ_SIZE = 64 * 1024
+
+# Bytes at the start and at the end of a file hashed by the client as its
+# fingerprint (chunked_upload.js uses the same size)
+FINGERPRINT_SAMPLE_SIZE = 1024 * 1024
+
+# Seconds a chunk write holds the session before another request may take over
+CHUNK_LEASE = 300
+
+
+def part_path(session_id):
+    return os.path.join(str(settings.UPLOAD_SESSION_DIR), f'{session_id}.part')
+
+
+def file_sha256(path, start=0, length=None):
+    """Hex SHA-256 of a file (or of ``length`` bytes from ``start``), read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        file.seek(start)
+        remaining = length
+        while remaining is None or remaining > 0:
+            block = file.read(1024 * 1024 if remaining is None else min(remaining, 1024 * 1024))
+            if not block:
+                break
+            digest.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path, size, modified):
+    """``<head sha256>:<tail sha256>:<modified>`` of a file, as computed by the client."""
+    sample = min(FINGERPRINT_SAMPLE_SIZE, size)
+    return f'{file_sha256(path, 0, sample)}:{file_sha256(path, size - sample, sample)}:{modified}'
+
+
+def parse_fingerprint(value):
+    """The fingerprint string of ``{"head", "tail", "modified"}`` sent by the client, ``''`` if missing, ``None`` if invalid."""
+    if not value:
+        return ''
+    try:
+        head, tail, modified = str(value['head']).lower(), str(value['tail']).lower(), int(value['modified'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not SHA256.match(head) or not SHA256.match(tail):
+        return None
+    return f'{head}:{tail}:{modified}'
+
+
+class UploadedPartFile(File):
+    """
+    A finished upload session as a ``File``. ``temporary_file_path`` makes
+    forms validate it from disk and lets ``FileSystemStorage`` move it into
+    place instead of copying; ``sha256`` spares the blob storage a re-hash.
+    """
+
+    def __init__(self, session):
+        super().__init__(open(part_path(session.pk), 'rb'), name=session.filename)
+        self.sha256 = session.sha256
+        self.content_type = None
+        self.charset = None
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def get_uploaded_file(session_id, user):
+    """The completed upload ``session_id`` of ``user`` as an ``UploadedPartFile``, or ``None``."""
+    if user is None or not user.is_authenticated:
+        return None
+    try:
+        session = UploadSession.objects.filter(pk=session_id, user=user, status=UploadSession.Status.COMPLETE).first()
+    except (ValueError, TypeError):
+        return None
+    if session is None or not os.path.exists(part_path(session.pk)):
+        return None
+    return UploadedPartFile(session)
+
+
+def _session_data(session):
+    return {
+        'id': str(session.pk),
+        'filename': session.filename,
+        'size': session.size,
+        'offset': session.received,
+        'complete': session.status == UploadSession.Status.COMPLETE,
+        'chunk_size': settings.UPLOAD_CHUNK_SIZE,
+    }
+
+
+def _error(message, status, **extra):
+    return JsonResponse({'error': message, **extra}, status=status)
+
+
+@require_http_methods(['POST'])
+def upload_create(request):
+    """
+    ``POST {"filename", "size", "sha256"?, "fingerprint"?}``: starts an
+    upload session, or returns the unfinished session of the same user and
+    file so a reloaded page resumes where it stopped. A session is only
+    resumed when the client identifies the content: by its ``sha256`` or by
+    a ``fingerprint`` (``{"head", "tail", "modified"}``: SHA-256 of the
+    first and last ``FINGERPRINT_SAMPLE_SIZE`` bytes and the modification
+    time), both verified when the last chunk arrives.
+    """
+    try:
+        data = json.loads(request.body)
+        filename = os.path.basename(str(data['filename']))[:255]
+        size = int(data['size'])
+    except (ValueError, KeyError, TypeError):
+        return _error('filename and size are required', 400)
+    sha256 = str(data.get('sha256') or '').lower()
+    if sha256 and not SHA256.match(sha256):
+        return _error('Invalid sha256', 400)
+    fingerprint = parse_fingerprint(data.get('fingerprint'))
+    if fingerprint is None:
+        return _error('Invalid fingerprint', 400)
+    if not filename or size <= 0 or size > settings.UPLOAD_MAX_SIZE:
+        return _error('Unsupported file size', 413 if size > 0 else 400)
+
+    session = None
+    if sha256 or fingerprint:
+        session = UploadSession.objects.filter(
+            user=request.user, filename=filename, size=size, sha256=sha256, fingerprint=fingerprint,
+            status=UploadSession.Status.PENDING
+        ).order_by('-updated_at').first()
+    if session is None:
+        session = UploadSession.objects.create(
+            user=request.user, filename=filename, size=size, sha256=sha256, fingerprint=fingerprint
+        )
+        os.makedirs(str(settings.UPLOAD_SESSION_DIR), exist_ok=True)
+        open(part_path(session.pk), 'wb').close()
+    return JsonResponse(_session_data(session), status=201)
+
+
+@require_http_methods(['GET', 'PUT', 'DELETE'])
+def upload_detail(request, pk):
+    """
+    ``GET``: the session and its offset. ``PUT`` with the raw chunk as the
+    body and ``Upload-Offset``: writes the chunk at that offset (an optional
+    ``Upload-Checksum: sha256 <hex>`` is verified). The last chunk verifies
+    the whole file. ``DELETE``: cancels the upload.
+    """
+    session = UploadSession.objects.filter(pk=pk, user=request.user).first()
+    if session is None:
+        return _error('Upload not found', 404)
+    if request.method == 'GET':
+        return JsonResponse(_session_data(session))
+    if request.method == 'DELETE':
+        session.delete()
+        if os.path.exists(part_path(pk)):
+            os.remove(part_path(pk))
+        return HttpResponse(status=204)
+    return _write_chunk(request, pk)
+
+
+def _write_chunk(request, pk):
+    try:
+        offset = int(request.headers['Upload-Offset'])
+        length = int(request.META['CONTENT_LENGTH'])
+    except (KeyError, ValueError):
+        return _error('Upload-Offset and Content-Length are required', 400)
+    checksum = request.headers.get('Upload-Checksum', '')
+    if checksum and not checksum.lower().startswith('sha256 '):
+        return _error('Only sha256 chunk checksums are supported', 400)
+
+    # The row lock only checks the offset and takes a lease on the session,
+    # so one chunk of a session is written at a time across workers; the
+    # chunk and the whole-file checks run outside the transaction
+    now = timezone.now()
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=pk)
+        if session.status == UploadSession.Status.COMPLETE:
+            return JsonResponse(_session_data(session))
+        if offset != session.received:
+            return _error('Offset mismatch', 409, offset=session.received)
+        if length <= 0 or length > settings.UPLOAD_CHUNK_SIZE or offset + length > session.size:
+            return _error('Invalid chunk size', 413)
+        if session.lease_until and session.lease_until > now:
+            return _error('Another chunk is being written', 409, offset=session.received)
+        session.lease_until = now + timedelta(seconds=CHUNK_LEASE)
+        session.save(update_fields=['lease_until', 'updated_at'])
+
+    released = False
+
+    def release(**fields):
+        nonlocal released
+        released = True
+        UploadSession.objects.filter(pk=pk).update(lease_until=None, updated_at=timezone.now(), **fields)
+
+    try:
+        digest = hashlib.sha256()
+        remaining = length
+        with open(part_path(pk), 'r+b') as file:
+            file.seek(offset)
+            file.truncate()
+            while remaining:
+                data = request.read(min(remaining, READ_SIZE))
+                if not data:
+                    break
+                file.write(data)
+                digest.update(data)
+                remaining -= len(data)
+            if remaining or (checksum and checksum.split(' ', 1)[1].strip().lower() != digest.hexdigest()):
+                # Interrupted or corrupted: drop the chunk, the client resends it
+                file.truncate(offset)
+                release()
+                return _error('Chunk incomplete or checksum mismatch', 422, offset=offset)
+
+        session.received = offset + length
+        session.lease_until = None
+        if session.received == session.size:
+            sha256 = file_sha256(part_path(pk))
+            fingerprint = session.fingerprint
+            if fingerprint:
+                fingerprint = file_fingerprint(part_path(pk), session.size, fingerprint.rsplit(':', 1)[1])
+            if (session.sha256 and session.sha256 != sha256) or fingerprint != session.fingerprint:
+                open(part_path(pk), 'wb').close()
+                release(received=0)
+                return _error('File checksum mismatch, upload restarted', 422, offset=0)
+            session.sha256 = sha256
+            session.status = UploadSession.Status.COMPLETE
+        release(received=session.received, sha256=session.sha256, status=session.status)
+        return JsonResponse(_session_data(session))
+    finally:
+        if not released:
+            # Failed mid-chunk (client gone, disk full): the offset is
+            # unchanged, so a resend of the chunk overwrites the partial write
+            release()
+
+
+def purge_upload_sessions(max_age=None):
+    """Deletes sessions (and their partial files) untouched for ``max_age`` seconds; returns how many."""
+    max_age = settings.UPLOAD_SESSION_MAX_AGE if max_age is None else max_age
+    expired = UploadSession.objects.filter(updated_at__lt=timezone.now() - timedelta(seconds=max_age))
+    count = 0
+    for session_id in expired.values_list('pk', flat=True):
+        if os.path.exists(part_path(session_id)):
+            os.remove(part_path(session_id))
+        count += 1
+    expired.delete()
+    return count
@@ -3,7 +3,7 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     CategoryViewSet, ProjectViewSet, ServiceCategoryViewSet,
     ServiceViewSet, TeamMemberViewSet, CEOViewSet, GalleryViewSet,
-    ContactFormViewSet
+    PageViewSet, ContactFormViewSet
 )
 
 router = DefaultRouter()
@@ -17,5 +17,6 @@ router.register(r'gallery', GalleryViewSet, basename='gallery')
 router.register(r'contact-forms', ContactFormViewSet, basename='contact-form')
 
 urlpatterns = [
+    path('pages/<str:type>/', PageViewSet.as_view({'get': 'retrieve'}), name='page-detail'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,79 @@
+import hashlib
+import threading
+from collections import Counter
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from parler.models import TranslatedFieldsModel
+from .models import (
+    Category, Project, ProjectImage, ProjectVideo, ProjectSEO,
+    ServiceCategory, Service, ServiceItem, ServiceDetail,
+    TeamMember, CEO, Gallery, GalleryImage, ContentVersion
+)
+
+
+# Models whose saves and deletes bump their change counter
+VERSIONED_MODELS = [
+    Category, Project, ProjectImage, ProjectVideo, ProjectSEO,
+    ServiceCategory, Service, ServiceItem, ServiceDetail,
+    TeamMember, CEO, Gallery, GalleryImage,
+]
+
+
+# Committed bumps made by this process, by version key
+_local_bumps = Counter()
+_local_bumps_lock = threading.Lock()
+
+
+def get_version_key(model):
+    """Translation models share the version of their master model."""
+    if issubclass(model, TranslatedFieldsModel):
+        model = model._meta.get_field('master').related_model
+    return model._meta.label_lower
+
+
+def _count_local_bump(key):
+    with _local_bumps_lock:
+        _local_bumps[key] += 1
+
+
+def local_bumps(model):
+    """How many increments of ``model``'s counter this process has committed."""
+    return _local_bumps[get_version_key(model)]
+
+
+def bump_version(model):
+    """Increments the change counter of ``model``; runs inside the caller's transaction."""
+    key = get_version_key(model)
+    transaction.on_commit(lambda: _count_local_bump(key))
+    updated = ContentVersion.objects.filter(key=key).update(
+        version=F('version') + 1,
+        updated_at=timezone.now()
+    )
+    if not updated:
+        try:
+            with transaction.atomic():
+                ContentVersion.objects.create(key=key, version=1)
+        except IntegrityError:
+            ContentVersion.objects.filter(key=key).update(
+                version=F('version') + 1,
+                updated_at=timezone.now()
+            )
+
+
+def get_versions(models):
+    """Returns ``({key: version}, last_modified)`` for ``models`` in one query."""
+    keys = sorted({get_version_key(model) for model in models})
+    versions = dict.fromkeys(keys, 0)
+    last_modified = None
+    for key, version, updated_at in ContentVersion.objects.filter(key__in=keys).values_list('key', 'version', 'updated_at'):
+        versions[key] = version
+        if last_modified is None or updated_at > last_modified:
+            last_modified = updated_at
+    return versions, last_modified
+
+
+def make_etag(versions, *parts):
+    """Strong ETag built from the version counters and the variant ``parts``."""
+    value = '|'.join([f'{key}:{version}' for key, version in sorted(versions.items())] + [str(part) for part in parts])
+    return '"%s"' % hashlib.sha1(value.encode('utf-8')).hexdigest()[:32]
@@ -0,0 +1,344 @@
+import io
+import logging
+import os
+import shutil
+import struct
+import subprocess
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+from .background import task
+from .imaging import encode_image, job_lock, resize_image
+from .models import ProjectVideo
+
+
+logger = logging.getLogger(__name__)
+
+# Largest header (MP4 ``moov``, Matroska ``Info`` / ``Tracks``) read into memory
+MAX_HEADER_SIZE = 16 * 1024 * 1024
+
+# Columns filled by ``probe_video``
+PROBE_FIELDS = ['duration', 'codec', 'width', 'height', 'bitrate']
+
+MP4_CONTAINERS = {'moov', 'trak', 'mdia', 'minf', 'stbl'}
+MP4_TOP_LEVEL = {b'ftyp', b'moov', b'mdat', b'free', b'skip', b'wide', b'pnot'}
+
+# Matroska / WebM element ids
+EBML = 0x1A45DFA3
+SEGMENT = 0x18538067
+INFO = 0x1549A966
+TIMECODE_SCALE = 0x2AD7B1
+DURATION = 0x4489
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_TYPE = 0x83
+CODEC_ID = 0x86
+VIDEO = 0xE0
+PIXEL_WIDTH = 0xB0
+PIXEL_HEIGHT = 0xBA
+CLUSTER = 0x1F43B675
+
+# Matroska codec ids -> the MP4 sample entry names used for ``codec``
+MATROSKA_CODECS = {
+    'V_MPEG4/ISO/AVC': 'avc1',
+    'V_MPEGH/ISO/HEVC': 'hvc1',
+    'V_AV1': 'av01',
+    'V_VP9': 'vp09',
+    'V_VP8': 'vp8',
+    'A_OPUS': 'opus',
+    'A_VORBIS': 'vorbis',
+    'A_AAC': 'mp4a',
+}
+
+
+def _mp4_boxes(data, start, end):
+    """``(type, payload_start, box_end)`` of the boxes in ``data[start:end]``."""
+    position = start
+    while position + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, position)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, position + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - position
+        if size < header:
+            return
+        yield box_type.decode('latin-1'), position + header, min(position + size, end)
+        position += size
+
+
+def _read_moov(file, file_size):
+    """The ``moov`` box payload; every other top-level box (``mdat``) is skipped with a seek."""
+    position = 0
+    while position + 8 <= file_size:
+        file.seek(position)
+        header = file.read(16)
+        size, box_type = struct.unpack_from('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - position
+        if size < header_size:
+            break
+        if box_type == b'moov':
+            if size > MAX_HEADER_SIZE:
+                raise ValueError('moov box too large')
+            file.seek(position + header_size)
+            data = file.read(size - header_size)
+            if len(data) < size - header_size:
+                raise ValueError('Truncated moov box')
+            return data
+        position += size
+    raise ValueError('No moov box')
+
+
+def probe_mp4(file, file_size):
+    data = _read_moov(file, file_size)
+    result = {}
+    tracks = []
+
+    def walk(start, end, track):
+        for box_type, payload, box_end in _mp4_boxes(data, start, end):
+            version = data[payload] if payload < box_end else 0
+            if box_type == 'mvhd':
+                timescale, duration = struct.unpack_from('>IQ' if version else '>II', data, payload + (20 if version else 12))
+                if timescale:
+                    result['duration'] = duration / timescale
+            elif box_type == 'trak':
+                track = {}
+                tracks.append(track)
+                walk(payload, box_end, track)
+            elif box_type == 'tkhd':
+                width, height = struct.unpack_from('>II', data, payload + (88 if version else 76))
+                track['width'], track['height'] = width >> 16, height >> 16
+            elif box_type == 'mdhd':
+                timescale, duration = struct.unpack_from('>IQ' if version else '>II', data, payload + (20 if version else 12))
+                if timescale:
+                    track['duration'] = duration / timescale
+            elif box_type == 'hdlr':
+                track['handler'] = data[payload + 8:payload + 12].decode('latin-1')
+            elif box_type == 'stsd' and box_end - payload >= 16:
+                track['codec'] = data[payload + 12:payload + 16].decode('latin-1').strip()
+                if box_end - payload >= 44 and not track.get('width'):
+                    track['width'], track['height'] = struct.unpack_from('>HH', data, payload + 40)
+            elif box_type in MP4_CONTAINERS:
+                walk(payload, box_end, track)
+
+    walk(0, len(data), None)
+    video = next((track for track in tracks if track.get('handler') == 'vide'), None)
+    main = video or next((track for track in tracks if track.get('handler') == 'soun'), {})
+    result.setdefault('duration', main.get('duration'))
+    result['codec'] = main.get('codec', '')
+    if video:
+        result['width'], result['height'] = video.get('width') or None, video.get('height') or None
+    return result
+
+
+def _read_vint(file, keep_marker=False):
+    """An EBML variable-length integer: ``(value, is_unknown_size)``."""
+    first = file.read(1)
+    if not first:
+        raise EOFError
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first[0] & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError('Invalid EBML variable-length integer')
+    value = first[0] if keep_marker else first[0] & (mask - 1)
+    for byte in file.read(length - 1):
+        value = (value << 8) | byte
+    return value, not keep_marker and value == (1 << (7 * length)) - 1
+
+
+def _ebml_elements(file, end):
+    """``(id, payload_start, size)`` of the elements up to ``end``; ``size`` is ``None`` when unknown."""
+    while file.tell() < end:
+        try:
+            element_id = _read_vint(file, keep_marker=True)[0]
+            size, unknown = _read_vint(file)
+        except EOFError:
+            return
+        start = file.tell()
+        yield element_id, start, None if unknown else size
+        if unknown:
+            continue
+        file.seek(start + size)
+
+
+def _ebml_uint(data):
+    return int.from_bytes(data, 'big') if data else 0
+
+
+def probe_webm(file, file_size):
+    result = {}
+    timecode_scale = 1_000_000
+    duration = None
+    tracks = []
+    file.seek(0)
+    for element_id, start, size in _ebml_elements(file, file_size):
+        if element_id == SEGMENT:
+            segment_end = file_size if size is None else start + size
+            for child_id, child_start, child_size in _ebml_elements(file, segment_end):
+                if child_id in (INFO, TRACKS):
+                    if child_size is None or child_size > MAX_HEADER_SIZE:
+                        raise ValueError('Header element too large')
+                    payload = io.BytesIO(file.read(child_size))
+                    if child_id == INFO:
+                        for info_id, info_start, info_size in _ebml_elements(payload, child_size):
+                            value = payload.read(info_size or 0)
+                            if info_id == TIMECODE_SCALE:
+                                timecode_scale = _ebml_uint(value) or timecode_scale
+                            elif info_id == DURATION and len(value) in (4, 8):
+                                duration = struct.unpack('>f' if len(value) == 4 else '>d', value)[0]
+                    else:
+                        tracks = _webm_tracks(payload, child_size)
+                    file.seek(child_start + child_size)
+                elif child_size is None or (child_id == CLUSTER and tracks):
+                    # Media data: the header elements come before it
+                    break
+            break
+    if duration is not None:
+        result['duration'] = duration * timecode_scale / 1e9
+    video = next((track for track in tracks if track.get('type') == 1), None)
+    main = video or next((track for track in tracks if track.get('type') == 2), {})
+    codec = main.get('codec', '')
+    result['codec'] = MATROSKA_CODECS.get(codec, codec.lower())
+    if video:
+        result['width'], result['height'] = video.get('width'), video.get('height')
+    return result
+
+
+def _webm_tracks(payload, end):
+    tracks = []
+    for entry_id, entry_start, entry_size in _ebml_elements(payload, end):
+        if entry_id != TRACK_ENTRY or entry_size is None:
+            continue
+        track = {}
+        entry_end = entry_start + entry_size
+        for field_id, field_start, field_size in _ebml_elements(payload, entry_end):
+            if field_id == VIDEO and field_size is not None:
+                for video_id, video_start, video_size in _ebml_elements(payload, field_start + field_size):
+                    value = _ebml_uint(payload.read(video_size or 0))
+                    if video_id == PIXEL_WIDTH:
+                        track['width'] = value
+                    elif video_id == PIXEL_HEIGHT:
+                        track['height'] = value
+                continue
+            value = payload.read(field_size or 0)
+            if field_id == TRACK_TYPE:
+                track['type'] = _ebml_uint(value)
+            elif field_id == CODEC_ID:
+                track['codec'] = value.decode('ascii', 'replace').rstrip('\x00')
+        tracks.append(track)
+    return tracks
+
+
+def probe_video(file, file_size):
+    """
+    Duration (s), codec, width, height and bitrate (bit/s) of an MP4/MOV or
+    WebM/Matroska file, read from the container headers only: ``mdat`` and
+    clusters are skipped with seeks, so a few KB are read whatever the size.
+    Raises ``ValueError`` for other or broken containers.
+    """
+    file.seek(0)
+    head = file.read(12)
+    try:
+        if head[:4] == EBML.to_bytes(4, 'big'):
+            result = probe_webm(file, file_size)
+        elif head[4:8] in MP4_TOP_LEVEL:
+            result = probe_mp4(file, file_size)
+        else:
+            raise ValueError('Unsupported video container')
+    except (struct.error, EOFError, IndexError, TypeError) as error:
+        raise ValueError(f'Broken video header: {error}')
+    duration = result.get('duration')
+    result['bitrate'] = round(file_size * 8 / duration) if duration else None
+    return {field: result.get(field) for field in PROBE_FIELDS} | {'codec': result.get('codec') or ''}
+
+
+def poster_path(name):
+    return f'posters/{os.path.splitext(name)[0]}.jpg'
+
+
+def make_poster(field_file, duration=None):
+    """
+    Poster frame of a stored video (at 1 s, or mid-way for shorter clips)
+    extracted with ``VIDEO_POSTER_FFMPEG``; returns its storage path, or ''
+    when ffmpeg isn't installed or fails.
+    """
+    ffmpeg = settings.VIDEO_POSTER_FFMPEG and shutil.which(settings.VIDEO_POSTER_FFMPEG)
+    if not ffmpeg:
+        return ''
+    position = min(1.0, duration / 2) if duration else 0
+    command = [
+        ffmpeg, '-v', 'error', '-ss', f'{position:.3f}', '-i', field_file.path,
+        '-frames:v', '1', '-f', 'image2pipe', '-vcodec', 'png', '-',
+    ]
+    try:
+        output = subprocess.run(command, capture_output=True, timeout=settings.VIDEO_POSTER_TIMEOUT, check=True).stdout
+        image = Image.open(io.BytesIO(output))
+        image.load()
+    except (OSError, ValueError, subprocess.SubprocessError) as error:
+        logger.warning('Poster extraction failed for %s: %s', field_file.name, error)
+        return ''
+    image = resize_image(image, settings.IMAGE_UPLOAD_MAX_SIDE, settings.IMAGE_UPLOAD_MAX_SIDE)
+    path = poster_path(field_file.name)
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    return default_storage.save(path, ContentFile(encode_image(image, 'jpeg')))
+
+
+@task(queue='media', max_retries=3)
+def delete_poster(path):
+    """Deletes a poster unless another video row (same stored file) still uses it."""
+    if path and not ProjectVideo.objects.filter(poster=path).exists():
+        default_storage.delete(path)
+
+
+def needs_probe(instance):
+    return (instance.video.name or '') != instance.probed_file
+
+
+@task(queue='media', max_retries=2)
+def refresh_video_probe(pk):
+    """
+    Background job: probes the video of one ``ProjectVideo`` after it
+    changed and stores its metadata and poster. Rows sharing a stored file
+    reuse its probe; unreadable files are recorded as probed with empty
+    values, so they aren't retried on every save.
+    """
+    with job_lock(f'video-probe:{pk}') as locked:
+        if not locked:
+            return
+        instance = ProjectVideo.objects.filter(pk=pk).first()
+        if instance is None or not needs_probe(instance):
+            return
+        name = instance.video.name or ''
+        values = {field: None for field in PROBE_FIELDS} | {'codec': '', 'poster': ''}
+        shared = name and ProjectVideo.objects.filter(probed_file=name).exclude(pk=pk).values(*PROBE_FIELDS, 'poster').first()
+        if shared:
+            values = shared
+        elif name:
+            try:
+                with instance.video.storage.open(name, 'rb') as file:
+                    values.update(probe_video(file, instance.video.storage.size(name)))
+            except (OSError, ValueError) as error:
+                logger.warning('Video probe failed for %s: %s', name, error)
+            values['poster'] = make_poster(instance.video, values['duration'])
+        if ProjectVideo.objects.filter(pk=pk).values_list('video', flat=True).first() != name:
+            # Replaced meanwhile; the job queued by that save takes over
+            delete_poster(values['poster'])
+            return
+        previous_poster = instance.poster
+        for field, value in values.items():
+            setattr(instance, field, value)
+        instance.probed_file = name
+        instance.save(update_fields=[*values, 'probed_file'])
+        if previous_poster != instance.poster:
+            delete_poster(previous_poster)
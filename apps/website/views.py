@@ -1,15 +1,26 @@
-from rest_framework import viewsets, filters
+from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django_filters import FilterSet, CharFilter, NumberFilter
+from django.conf import settings
+from django.db.models import Case, When, Value, IntegerField
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 from .models import (
     Category, Project, ProjectImage, ProjectVideo, ProjectSEO,
     ServiceCategory, Service, ServiceItem, ServiceDetail,
-    TeamMember, CEO, Gallery, ContactForm
+    TeamMember, CEO, Gallery, GalleryImage, ContactForm, SearchKey
 )
+from .autocomplete import autocomplete_index
+from .facets import get_project_facets
+from .ingestion import contact_form_buffer
+from .mixins import CachedResponseMixin, ConditionalGetMixin, SparseFieldsViewSetMixin, TranslationsViewSetMixin
+from .pagination import CreatedAtCursorPagination
+from .search import fuzzy_search, rank_projects, search_projects
+from .snapshots import ProjectSnapshotSerializer
+from .translations import translation_prefetch
 from .serializers import (
     CategorySerializer, ProjectSerializer, ServiceCategorySerializer,
     ServiceSerializer, TeamMemberSerializer, CEOSerializer, GallerySerializer,
@@ -17,18 +28,37 @@ from .serializers import (
 )
 
 
+LANG_PARAMETER = OpenApiParameter(
+    'lang', OpenApiTypes.STR,
+    description='Language(s) to return: ru, uz, ru,uz or all. Defaults to the Accept-Language match, or all languages'
+)
+
+FIELDS_PARAMETER = OpenApiParameter(
+    'fields', OpenApiTypes.STR,
+    description='Comma separated top-level fields to return (e.g. id,translations). Defaults to all fields'
+)
+
+EXPAND_PARAMETER = OpenApiParameter(
+    'expand', OpenApiTypes.STR,
+    description='Comma separated relations to embed (e.g. category,images); other relations are returned as ids '
+                'or left out. Defaults to embedding all relations'
+)
+
+
 @extend_schema(
     tags=['Categories'],
     summary='Get all categories',
-    description='Returns a list of all categories with translations (ru/uz)'
+    description='Returns a list of all categories with translations (ru/uz)',
+    parameters=[FIELDS_PARAMETER, LANG_PARAMETER]
 )
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, CachedResponseMixin, SparseFieldsViewSetMixin, TranslationsViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Category model.
     Returns categories with translations in Russian and Uzbek.
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    version_models = [Category]
 
 
 class ProjectFilter(FilterSet):
@@ -38,16 +68,63 @@ class ProjectFilter(FilterSet):
     material = CharFilter(field_name='material', lookup_expr='icontains')
     
     def filter_by_name(self, queryset, name, value):
-        return queryset.filter(translations__name__icontains=value).distinct()
+        return queryset.filter(pk__in=search_projects(value, fields=['name']))
     
     def filter_by_brand(self, queryset, name, value):
-        return queryset.filter(translations__brand__icontains=value).distinct()
+        return queryset.filter(pk__in=search_projects(value, fields=['brand']))
     
     class Meta:
         model = Project
         fields = ['name', 'category', 'brand', 'material']
 
 
+class RankedSearchFilter(filters.SearchFilter):
+    """
+    ``?search=`` served by ``rank``, a function returning the ids matching a
+    query best first. Annotates ``search_rank`` (0 = best match) for
+    ``RankedOrderingFilter``.
+    """
+    
+    def __init__(self, rank):
+        self.rank = rank
+    
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not query.strip():
+            return queryset
+        object_ids = self.rank(query)
+        if not object_ids:
+            return queryset.none()
+        rank = Case(
+            *[When(pk=pk, then=Value(position)) for position, pk in enumerate(object_ids)],
+            output_field=IntegerField()
+        )
+        return queryset.filter(pk__in=object_ids).annotate(search_rank=rank)
+
+
+class ProjectSearchFilter(RankedSearchFilter):
+    """Full-text matches first, then fuzzy name matches (typos, Latin/Cyrillic spelling)."""
+    
+    def __init__(self):
+        super().__init__(rank_projects)
+
+
+class ServiceSearchFilter(RankedSearchFilter):
+    """Fuzzy service name search, tolerant of typos and Latin/Cyrillic spelling."""
+    
+    def __init__(self):
+        super().__init__(lambda query: fuzzy_search(SearchKey.Kind.SERVICE, query))
+
+
+class RankedOrderingFilter(filters.OrderingFilter):
+    """Orders searched querysets by relevance unless ``?ordering=`` is given."""
+    
+    def get_ordering(self, request, queryset, view):
+        if not request.query_params.get(self.ordering_param) and 'search_rank' in queryset.query.annotations:
+            return ['search_rank', '-created_at']
+        return super().get_ordering(request, queryset, view)
+
+
 @extend_schema(
     tags=['Projects'],
     summary='Get all projects',
@@ -58,60 +135,129 @@ class ProjectFilter(FilterSet):
         OpenApiParameter('category', OpenApiTypes.INT, description='Filter by category ID'),
         OpenApiParameter('brand', OpenApiTypes.STR, description='Filter by brand name'),
         OpenApiParameter('material', OpenApiTypes.STR, description='Filter by material'),
-        OpenApiParameter('search', OpenApiTypes.STR, description='Search in name and brand fields'),
+        OpenApiParameter('search', OpenApiTypes.STR, description='Full-text search in name, brand, country and descriptions (ru/uz), ranked by relevance; also matches names with typos or in the other script (Latin/Cyrillic)'),
         OpenApiParameter('ordering', OpenApiTypes.STR, description='Order by field (e.g., -created_at)'),
         OpenApiParameter('page', OpenApiTypes.INT, description='Page number for pagination'),
+        OpenApiParameter('pagination', OpenApiTypes.STR, description='Set to "cursor" for keyset pagination over (created_at, id)'),
+        OpenApiParameter('cursor', OpenApiTypes.STR, description='Cursor from the "next" link (implies cursor pagination)'),
+        FIELDS_PARAMETER,
+        EXPAND_PARAMETER,
+        LANG_PARAMETER,
     ]
 )
-class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
+class ProjectViewSet(ConditionalGetMixin, CachedResponseMixin, SparseFieldsViewSetMixin, TranslationsViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Project model.
     Returns projects with translations (ru/uz), images, videos, and SEO data.
     Supports pagination, filtering by name, category, brand, material, and limit.
+    ``?pagination=cursor`` (or any ``?cursor=``) switches to keyset pagination.
+    ``facets/`` returns filter counts for the same filters.
+    ``suggest/`` serves search-as-you-type from the in-memory autocomplete index.
+    Responses are read from the stored per-project snapshots.
     """
-    queryset = Project.objects.prefetch_related(
-        'images',
-        'videos',
-        'seo'
-    ).select_related('category')
+    queryset = Project.objects.filter(deleted_at__isnull=True).only('id', 'created_at', 'snapshot')
+    translation_prefetches = []
     serializer_class = ProjectSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    version_models = [Project, Category, ProjectImage, ProjectVideo, ProjectSEO]
+    filter_backends = [DjangoFilterBackend, ProjectSearchFilter, RankedOrderingFilter]
     filterset_class = ProjectFilter
-    search_fields = ['translations__name', 'translations__brand']
     ordering_fields = ['created_at']
     ordering = ['-created_at']
     
-    def get_queryset(self):
-        queryset = super().get_queryset()
+    def get_limit(self):
         limit = self.request.query_params.get('limit', None)
         if limit:
             try:
                 limit = int(limit)
                 if limit > 0:
-                    queryset = queryset[:limit]
+                    return limit
             except ValueError:
                 pass
+        return None
+    
+    def is_cursor_pagination(self):
+        params = self.request.query_params
+        return 'cursor' in params or params.get('pagination') == 'cursor'
+    
+    def get_serializer_class(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return ProjectSerializer
+        return ProjectSnapshotSerializer
+    
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        limit = self.get_limit()
+        if limit and self.action == 'list':
+            queryset = queryset[:limit]
         return queryset
     
     def list(self, request, *args, **kwargs):
-        limit = request.query_params.get('limit', None)
-        if limit:
+        if self.get_limit():
             self.pagination_class = None
+        elif self.is_cursor_pagination():
+            self.pagination_class = CreatedAtCursorPagination
         return super().list(request, *args, **kwargs)
+    
+    @extend_schema(
+        summary='Get project facet counts',
+        description='Returns per-value project counts for category, material, brand and country, '
+                    'under the same filters and search as the project list.',
+        responses={200: OpenApiTypes.OBJECT}
+    )
+    @action(detail=False, pagination_class=None)
+    def facets(self, request, *args, **kwargs):
+        def handler(request, *args, **kwargs):
+            return Response(get_project_facets(
+                self.filter_queryset(self.get_queryset()),
+                self.get_languages()
+            ))
+        
+        def cached_handler(request, *args, **kwargs):
+            return self.cached_response(handler, request, *args, **kwargs)
+        
+        return self.conditional_response(cached_handler, request, *args, **kwargs)
+    
+    @extend_schema(
+        summary='Suggest project names and brands',
+        description='Search-as-you-type suggestions: project names and brands with a word starting with "q" '
+                    '(Latin or Cyrillic), served from an in-memory index.',
+        parameters=[
+            OpenApiParameter('q', OpenApiTypes.STR, description='Typed prefix'),
+            OpenApiParameter('limit', OpenApiTypes.INT, description='Maximum number of suggestions (default 10, max 50)'),
+            LANG_PARAMETER,
+        ],
+        responses={200: OpenApiTypes.OBJECT}
+    )
+    @action(detail=False, pagination_class=None, filter_backends=[])
+    def suggest(self, request, *args, **kwargs):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
+        autocomplete_index.refresh()
+        return Response({
+            'results': autocomplete_index.suggest(
+                request.query_params.get('q', ''),
+                self.get_languages(),
+                limit
+            )
+        })
 
 
 @extend_schema(
     tags=['Service Categories'],
     summary='Get all service categories',
-    description='Returns a list of all service categories with translations (ru/uz)'
+    description='Returns a list of all service categories with translations (ru/uz)',
+    parameters=[FIELDS_PARAMETER, LANG_PARAMETER]
 )
-class ServiceCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class ServiceCategoryViewSet(ConditionalGetMixin, SparseFieldsViewSetMixin, TranslationsViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for ServiceCategory model.
     Returns service categories with translations in Russian and Uzbek.
     """
     queryset = ServiceCategory.objects.all()
     serializer_class = ServiceCategorySerializer
+    version_models = [ServiceCategory]
 
 
 class ServiceFilter(FilterSet):
@@ -128,34 +274,49 @@ class ServiceFilter(FilterSet):
     description='Returns a list of services with translations, service items, and service details. Supports filtering by category.',
     parameters=[
         OpenApiParameter('category', OpenApiTypes.INT, description='Filter by service category ID'),
+        OpenApiParameter('search', OpenApiTypes.STR, description='Fuzzy search by service name (ru/uz, Latin or Cyrillic), ranked by similarity'),
+        OpenApiParameter('ordering', OpenApiTypes.STR, description='Order by field (e.g., -created_at)'),
+        FIELDS_PARAMETER,
+        EXPAND_PARAMETER,
+        LANG_PARAMETER,
     ]
 )
-class ServiceViewSet(viewsets.ReadOnlyModelViewSet):
+class ServiceViewSet(ConditionalGetMixin, CachedResponseMixin, SparseFieldsViewSetMixin, TranslationsViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Service model.
     Returns services with translations (ru/uz), service items, and service details.
     Supports filtering by service category.
     """
-    queryset = Service.objects.prefetch_related(
-        'service_items__service_details'
-    ).select_related('category')
+    queryset = Service.objects.all()
+    select_related_lookups = ['category']
+    prefetch_lookups = ['service_items__service_details']
+    translation_prefetches = [
+        'translations',
+        'category__translations',
+        'service_items__translations',
+        'service_items__service_details__translations'
+    ]
     serializer_class = ServiceSerializer
-    filter_backends = [DjangoFilterBackend]
+    version_models = [Service, ServiceCategory, ServiceItem, ServiceDetail]
+    filter_backends = [DjangoFilterBackend, ServiceSearchFilter, RankedOrderingFilter]
     filterset_class = ServiceFilter
+    ordering_fields = ['created_at']
 
 
 @extend_schema(
     tags=['Team Members'],
     summary='Get all team members',
-    description='Returns a list of all team members with translations (ru/uz) and images'
+    description='Returns a list of all team members with translations (ru/uz) and images',
+    parameters=[FIELDS_PARAMETER, LANG_PARAMETER]
 )
-class TeamMemberViewSet(viewsets.ReadOnlyModelViewSet):
+class TeamMemberViewSet(ConditionalGetMixin, CachedResponseMixin, SparseFieldsViewSetMixin, TranslationsViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for TeamMember model.
     Returns team members with translations in Russian and Uzbek, and images.
     """
     queryset = TeamMember.objects.all()
     serializer_class = TeamMemberSerializer
+    version_models = [TeamMember]
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -166,29 +327,34 @@ class TeamMemberViewSet(viewsets.ReadOnlyModelViewSet):
 @extend_schema(
     tags=['CEO'],
     summary='Get CEO information',
-    description='Returns CEO information with translations (ru/uz)'
+    description='Returns CEO information with translations (ru/uz)',
+    parameters=[FIELDS_PARAMETER, LANG_PARAMETER]
 )
-class CEOViewSet(viewsets.ReadOnlyModelViewSet):
+class CEOViewSet(ConditionalGetMixin, CachedResponseMixin, SparseFieldsViewSetMixin, TranslationsViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for CEO model.
     Returns CEO information with translations in Russian and Uzbek.
     """
     queryset = CEO.objects.all()
     serializer_class = CEOSerializer
+    version_models = [CEO]
 
 
 @extend_schema(
     tags=['Gallery'],
     summary='Get all gallery images',
-    description='Returns a list of all gallery images with full URLs'
+    description='Returns a list of all gallery images with full URLs',
+    parameters=[FIELDS_PARAMETER, EXPAND_PARAMETER, LANG_PARAMETER]
 )
-class GalleryViewSet(viewsets.ReadOnlyModelViewSet):
+class GalleryViewSet(ConditionalGetMixin, CachedResponseMixin, SparseFieldsViewSetMixin, TranslationsViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Gallery model.
     Returns gallery images with full URLs.
     """
-    queryset = Gallery.objects.all()
+    queryset = Gallery.objects.filter(deleted_at__isnull=True)
+    prefetch_lookups = ['images']
     serializer_class = GallerySerializer
+    version_models = [Gallery, GalleryImage]
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -196,18 +362,119 @@ class GalleryViewSet(viewsets.ReadOnlyModelViewSet):
         return context
 
 
+@extend_schema(
+    tags=['Pages'],
+    summary='Get page data',
+    description='Returns every block a site page needs (CEO texts of the page, categories, latest projects, '
+                'services, team, gallery, ...) in one response, cached as a unit.',
+    parameters=[
+        OpenApiParameter('type', OpenApiTypes.STR, OpenApiParameter.PATH, enum=CEO.TypePage.values, description='Page type'),
+        LANG_PARAMETER,
+    ],
+    responses={200: OpenApiTypes.OBJECT}
+)
+class PageViewSet(ConditionalGetMixin, CachedResponseMixin, TranslationsViewSetMixin, viewsets.GenericViewSet):
+    """
+    Composite read endpoint for the site pages keyed on ``CEO.TypePage``.
+    Each block is rendered with the queryset, translation prefetches and
+    serializer of its own viewset, so a page costs a fixed number of
+    queries. The response is cached and validated with the versions of all
+    models the page's blocks use.
+    """
+    block_viewsets = {
+        'ceo': CEOViewSet,
+        'categories': CategoryViewSet,
+        'projects': ProjectViewSet,
+        'service_categories': ServiceCategoryViewSet,
+        'services': ServiceViewSet,
+        'team_members': TeamMemberViewSet,
+        'gallery': GalleryViewSet,
+    }
+    page_blocks = {
+        CEO.TypePage.MAIN: ['ceo', 'categories', 'projects', 'services', 'team_members', 'gallery'],
+        CEO.TypePage.ABOUT: ['ceo', 'team_members'],
+        CEO.TypePage.TEAM: ['ceo', 'team_members'],
+        CEO.TypePage.CONTACT: ['ceo'],
+        CEO.TypePage.SERVICE: ['ceo', 'service_categories', 'services'],
+        CEO.TypePage.PROJECT: ['ceo', 'categories'],
+        CEO.TypePage.GALLERY: ['ceo', 'gallery'],
+    }
+    project_limit = 8
+    
+    def get_block_names(self):
+        if self.kwargs['type'] not in self.page_blocks:
+            raise NotFound()
+        return self.page_blocks[self.kwargs['type']]
+    
+    @property
+    def version_models(self):
+        models = []
+        for name in self.get_block_names():
+            models.extend(self.block_viewsets[name].version_models)
+        return models
+    
+    def get_block_queryset(self, name):
+        viewset = self.block_viewsets[name]
+        queryset = viewset.queryset.all()
+        if viewset.select_related_lookups:
+            queryset = queryset.select_related(*viewset.select_related_lookups)
+        languages = self.get_languages()
+        queryset = queryset.prefetch_related(*viewset.prefetch_lookups, *[
+            translation_prefetch(queryset.model, lookup, languages)
+            for lookup in viewset.translation_prefetches
+        ])
+        if name == 'ceo':
+            queryset = queryset.filter(type=self.kwargs['type'])
+        elif name == 'projects':
+            queryset = queryset.order_by('-created_at')[:self.project_limit]
+        return queryset
+    
+    def get_block_serializer_class(self, name):
+        if name == 'projects':
+            return ProjectSnapshotSerializer
+        return self.block_viewsets[name].serializer_class
+    
+    def get_page_data(self):
+        context = self.get_serializer_context()
+        data = {'type': self.kwargs['type']}
+        for name in self.get_block_names():
+            serializer_class = self.get_block_serializer_class(name)
+            data[name] = serializer_class(self.get_block_queryset(name), many=True, context=context).data
+        return data
+    
+    def retrieve(self, request, *args, **kwargs):
+        def handler(request, *args, **kwargs):
+            return Response(self.get_page_data())
+        
+        def cached_handler(request, *args, **kwargs):
+            return self.cached_response(handler, request, *args, **kwargs)
+        
+        return self.conditional_response(cached_handler, request, *args, **kwargs)
+
+
 @extend_schema(
     tags=['Contact Forms'],
     summary='Create contact form',
-    description='Submit a contact form with name, phone, email, and message. Returns the created contact form.',
+    description='Submit a contact form with name, phone, email, and message. Returns the created contact form; '
+                'with buffered ingestion enabled, returns 202 with its `submission_id` and saves it shortly after.',
     request=ContactFormSerializer,
-    responses={201: ContactFormSerializer}
+    responses={201: ContactFormSerializer, 202: OpenApiTypes.OBJECT}
 )
 class ContactFormViewSet(viewsets.ModelViewSet):
     """
     ViewSet for ContactForm model.
     Supports only POST to create new contact forms.
+    With ``CONTACT_FORM_BUFFERED`` submissions are validated, spooled and
+    acknowledged with 202; ``contact_form_buffer`` saves them in batches.
     """
     queryset = ContactForm.objects.all()
     serializer_class = ContactFormSerializer
     http_method_names = ['post']
+    
+    def create(self, request, *args, **kwargs):
+        if not settings.CONTACT_FORM_BUFFERED:
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        submission_id = contact_form_buffer.submit(serializer.validated_data)
+        return Response({'submission_id': submission_id}, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,29 @@
+"""
+Celery application, used when ``TASK_BACKEND = 'celery'``.
+
+Start a worker per queue (or one for all of them) with::
+
+    celery -A config worker -Q media,default,exports,notifications
+
+Without Celery installed, tasks run on the in-process executors.
+"""
+
+import os
+
+try:
+    from celery import Celery
+except ImportError:
+    Celery = None
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+app = None
+
+if Celery is not None:
+    app = Celery('config')
+    app.config_from_object('django.conf:settings', namespace='CELERY')
+
+    @app.task(name='website.run_task')
+    def run_task(message):
+        from apps.website.background import execute
+        execute(message)
@@ -98,6 +98,136 @@ DATABASES = {
 #     }
 # }
 
+# Cache
+# Redis when REDIS_URL is set, otherwise a per-process local-memory cache
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# API response cache (seconds): fresh period, extra stale-while-revalidate
+# period and the single-flight recomputation lock
+API_CACHE_TIMEOUT = 60 * 5
+API_CACHE_STALE_TIMEOUT = 60 * 60
+API_CACHE_LOCK_TIMEOUT = 10
+
+# Minimum share of query trigrams a name must contain to match fuzzy search
+FUZZY_SEARCH_THRESHOLD = 0.4
+
+# Seconds between checks for project changes made by other processes
+# (in-memory autocomplete index)
+AUTOCOMPLETE_REFRESH_INTERVAL = 5
+
+# Background tasks (apps/website/background.py): 'thread' runs them in
+# worker threads of this process, 'eager' right after the commit in the
+# calling thread (tests), 'celery' on Celery workers (config/celery.py)
+TASK_BACKEND = os.environ.get('TASK_BACKEND', 'thread')
+
+# Task queues and their worker threads in the 'thread' backend
+TASK_QUEUES = {
+    'media': 2,
+    'default': 1,
+    'exports': 1,
+    'notifications': 1,
+}
+
+# How long an idempotency key keeps a task from being queued again (seconds)
+TASK_IDEMPOTENCY_TIMEOUT = 60 * 60 * 24
+
+# Called with the name, queue, status, duration and attempt of every task run
+TASK_METRICS_HOOK = 'apps.website.background.log_task_metrics'
+
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', REDIS_URL)
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# Contact form notifications: recipients (comma-separated) and sender
+CONTACT_FORM_NOTIFY_EMAILS = [
+    email.strip() for email in os.environ.get('CONTACT_FORM_NOTIFY_EMAILS', '').split(',') if email.strip()
+]
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'webmaster@localhost')
+
+# Buffered contact form ingestion: POSTs are validated, spooled to an
+# fsynced append-only file and acknowledged with 202; a writer thread saves
+# them with bulk_create. Off: one INSERT per POST (201)
+CONTACT_FORM_BUFFERED = os.environ.get('CONTACT_FORM_BUFFERED', '').lower() in ('1', 'true', 'yes')
+CONTACT_FORM_SPOOL_DIR = BASE_DIR / 'cache' / 'contact_forms'
+CONTACT_FORM_SPOOL_SEGMENT_SIZE = 1024 * 1024
+CONTACT_FORM_BATCH_SIZE = 200
+CONTACT_FORM_FLUSH_INTERVAL = 0.5
+CONTACT_FORM_QUEUE_SIZE = 10000
+
+# Background data exports (XLSX), kept outside MEDIA_ROOT: they are only
+# downloadable from the admin
+EXPORT_ROOT = BASE_DIR / 'private' / 'exports'
+
+# Responsive image variants generated after upload: widths in px and formats
+# in order of preference (formats this Pillow build can't encode are skipped)
+IMAGE_VARIANT_WIDTHS = [320, 640, 960, 1280, 1920]
+IMAGE_VARIANT_FORMATS = ['avif', 'webp', 'jpeg']
+IMAGE_VARIANT_QUALITY = 80
+
+# Deleted projects and galleries are hidden at once and purged in the
+# background, this many child rows per transaction
+DELETION_BATCH_SIZE = 100
+
+# Upload normalization of ImageFields: longest stored side, JPEG/WebP
+# quality, and the largest accepted image (decompression-bomb limit, also
+# applied to every image Pillow opens). Only JPEG can be decoded at a
+# reduced scale; other formats are decoded in full (4 bytes per pixel), so
+# they get the lower IMAGE_DECODE_MAX_PIXELS
+IMAGE_UPLOAD_MAX_SIDE = 2560
+IMAGE_UPLOAD_QUALITY = 88
+IMAGE_MAX_PIXELS = 64_000_000
+IMAGE_DECODE_MAX_PIXELS = 16_000_000
+
+# Poster frames of uploaded videos: ffmpeg executable ('' disables posters;
+# metadata is probed in Python either way) and its time limit in seconds
+VIDEO_POSTER_FFMPEG = 'ffmpeg'
+VIDEO_POSTER_TIMEOUT = 30
+
+# On-demand resizing at /media/resize/<W>x<H>[-crop]/<path>: specs allowed
+# without a signature, largest side, LRU disk cache and browser max-age
+IMAGE_RESIZE_PRESETS = ['320x0', '640x0', '960x0', '1280x0', '1920x0', '300x300-crop', '600x400-crop']
+IMAGE_RESIZE_MAX_SIZE = 2560
+IMAGE_RESIZE_CACHE_DIR = BASE_DIR / 'cache' / 'resize'
+IMAGE_RESIZE_CACHE_SIZE = 512 * 1024 * 1024
+IMAGE_RESIZE_MAX_AGE = 60 * 60 * 24 * 30
+
+# Serving of /media/: browser max-age (content-addressed blobs never change
+# and are cached as immutable for a year), and optional offload of the file
+# transfer to the front server ('' streams from Django, 'x-accel-redirect'
+# for nginx with an internal location at MEDIA_OFFLOAD_PREFIX aliased to
+# MEDIA_ROOT, 'x-sendfile' for Apache mod_xsendfile / lighttpd)
+MEDIA_MAX_AGE = 60 * 60 * 24 * 7
+MEDIA_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+MEDIA_OFFLOAD = ''
+MEDIA_OFFLOAD_PREFIX = '/protected-media/'
+
+# Resumable chunked uploads in the admin: chunk size sent by the widget,
+# largest accepted file, lifetime of unfinished uploads, and the directory
+# of partial files. Finished files are moved into the media storage with
+# file_move_safe: a rename when the directory is on the same filesystem as
+# MEDIA_ROOT, a full copy otherwise. It must not be inside MEDIA_ROOT, which
+# is served publicly
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_MAX_SIZE = 4 * 1024 * 1024 * 1024
+UPLOAD_SESSION_MAX_AGE = 60 * 60 * 24
+UPLOAD_SESSION_DIR = BASE_DIR / 'cache' / 'uploads'
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -3,19 +3,22 @@ from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from django.conf.urls.i18n import i18n_patterns
-from django.views.static import serve
+from apps.website.media import resize_view, serve_media
+from apps.website.uploads import upload_create, upload_detail
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
 
 urlpatterns = [
     path('i18n/', include('django.conf.urls.i18n')),
+    path('admin/uploads/', admin.site.admin_view(upload_create), name='admin-upload-create'),
+    path('admin/uploads/<uuid:pk>/', admin.site.admin_view(upload_detail), name='admin-upload-detail'),
     path('admin/', admin.site.urls),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('swagger/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
     path('api/', include('apps.website.urls')),
+    re_path(r'^media/resize/(?P<spec>[^/]+)/(?P<path>.+)$', resize_view, name='media-resize'),
 ]
 
 
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-urlpatterns += [re_path(r"^media/(?P<path>.*)$", serve, {"document_root": settings.MEDIA_ROOT, }, ), ]
+urlpatterns += [re_path(r"^media/(?P<path>.*)$", serve_media, name='media'), ]
@@ -0,0 +1,166 @@
+// Resumable chunked uploads for file inputs rendered by ChunkedFileInput
+(function() {
+    var pending = 0;
+    var MAX_RETRIES = 5;
+
+    function csrfToken(form) {
+        var input = form && form.querySelector('input[name="csrfmiddlewaretoken"]');
+        if (input) {
+            return input.value;
+        }
+        var match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+        return match ? decodeURIComponent(match[1]) : '';
+    }
+
+    function toHex(buffer) {
+        return Array.prototype.map.call(new Uint8Array(buffer), function(byte) {
+            return ('0' + byte.toString(16)).slice(-2);
+        }).join('');
+    }
+
+    function chunkChecksum(blob) {
+        // crypto.subtle exists only on HTTPS / localhost; the server checks the whole file anyway
+        if (!window.crypto || !window.crypto.subtle) {
+            return Promise.resolve('');
+        }
+        return blob.arrayBuffer().then(function(buffer) {
+            return window.crypto.subtle.digest('SHA-256', buffer);
+        }).then(function(digest) {
+            return 'sha256 ' + toHex(digest);
+        });
+    }
+
+    function fingerprint(file, sampleSize) {
+        // SHA-256 of the first and last bytes plus the modification time: the
+        // server resumes an unfinished upload only for the same fingerprint
+        // and verifies it once the file is complete
+        if (!window.crypto || !window.crypto.subtle || !sampleSize) {
+            return Promise.resolve(null);
+        }
+        var sample = Math.min(sampleSize, file.size);
+        function digest(blob) {
+            return blob.arrayBuffer().then(function(buffer) {
+                return window.crypto.subtle.digest('SHA-256', buffer);
+            }).then(toHex);
+        }
+        return Promise.all([
+            digest(file.slice(0, sample)),
+            digest(file.slice(file.size - sample, file.size))
+        ]).then(function(hashes) {
+            return {head: hashes[0], tail: hashes[1], modified: file.lastModified || 0};
+        });
+    }
+
+    function request(method, url, token, body, headers) {
+        return fetch(url, {
+            method: method,
+            body: body,
+            credentials: 'same-origin',
+            headers: Object.assign({'X-CSRFToken': token}, headers || {})
+        }).then(function(response) {
+            return response.json().catch(function() { return {}; }).then(function(data) {
+                data.status = response.status;
+                return data;
+            });
+        });
+    }
+
+    function sleep(ms) {
+        return new Promise(function(resolve) { setTimeout(resolve, ms); });
+    }
+
+    function upload(input, file) {
+        var form = input.form;
+        var token = csrfToken(form);
+        var hidden = form.querySelector('input[name="' + input.name + '_upload"]');
+        var progress = hidden && hidden.nextElementSibling;
+        var createUrl = input.getAttribute('data-chunked-upload');
+        var retries = 0;
+
+        function show(text) {
+            if (progress) {
+                progress.textContent = text;
+            }
+        }
+
+        function sendFrom(session, offset) {
+            if (offset >= file.size) {
+                return Promise.resolve(session);
+            }
+            show('Загрузка: ' + Math.floor(offset * 100 / file.size) + '%');
+            var chunk = file.slice(offset, Math.min(offset + session.chunk_size, file.size));
+            return chunkChecksum(chunk).then(function(checksum) {
+                var headers = {'Content-Type': 'application/octet-stream', 'Upload-Offset': String(offset)};
+                if (checksum) {
+                    headers['Upload-Checksum'] = checksum;
+                }
+                return request('PUT', createUrl + session.id + '/', token, chunk, headers);
+            }).then(function(data) {
+                if (data.status === 200) {
+                    retries = 0;
+                    return data.complete ? data : sendFrom(data, data.offset);
+                }
+                if ((data.status === 409 || data.status === 422) && typeof data.offset === 'number' && retries++ < MAX_RETRIES) {
+                    return sendFrom(session, data.offset);
+                }
+                throw new Error(data.error || ('HTTP ' + data.status));
+            }, function(error) {
+                // Network failure: ask the server where to resume
+                if (retries++ >= MAX_RETRIES) {
+                    throw error;
+                }
+                return sleep(1000 * Math.pow(2, retries)).then(function() {
+                    return request('GET', createUrl + session.id + '/', token);
+                }).then(function(data) {
+                    return sendFrom(session, data.status === 200 ? data.offset : offset);
+                }, function() {
+                    return sendFrom(session, offset);
+                });
+            });
+        }
+
+        pending++;
+        if (hidden) {
+            hidden.value = '';
+        }
+        show('Загрузка: 0%');
+        var sampleSize = parseInt(input.getAttribute('data-fingerprint-sample'), 10);
+        return fingerprint(file, sampleSize).then(function(print) {
+            var body = {filename: file.name, size: file.size};
+            if (print) {
+                body.fingerprint = print;
+            }
+            return request('POST', createUrl, token, JSON.stringify(body), {'Content-Type': 'application/json'});
+        }).then(function(session) {
+            if (session.status !== 201) {
+                throw new Error(session.error || ('HTTP ' + session.status));
+            }
+            return sendFrom(session, session.offset);
+        }).then(function(session) {
+            if (hidden) {
+                hidden.value = session.id;
+            }
+            // The file itself is no longer posted with the form
+            input.value = '';
+            show('Загружено: ' + file.name);
+        }).catch(function(error) {
+            show('Ошибка загрузки (' + error.message + '), выберите файл ещё раз, чтобы продолжить');
+        }).then(function() {
+            pending--;
+        });
+    }
+
+    document.addEventListener('change', function(event) {
+        var input = event.target;
+        if (input.matches && input.matches('input[type="file"][data-chunked-upload]') && input.files.length) {
+            upload(input, input.files[0]);
+        }
+    });
+
+    document.addEventListener('submit', function(event) {
+        if (pending > 0) {
+            event.preventDefault();
+            alert('Дождитесь окончания загрузки файлов.');
+        }
+    }, true);
+})();